@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.compiled_inference import CompiledModel
+
+# Per-call latency of keras model.predict vs the compiled tf.function path
+# (utils/compiled_inference.py) at the small batch sizes the backend, camera
+# loop and live detector use. Runs on the real .h5 models when present,
+# otherwise on randomly initialized stand-ins with the same architecture.
+
+IMG_MODEL_PATH = "models/best_model.h5"
+SENSOR_MODEL_PATH = "models/lstm_autoencoder.h5"
+
+def load_or_standin(kind):
+    from tensorflow.keras.models import load_model
+    from utils.architectures import build_image_classifier, build_lstm_autoencoder
+    path = IMG_MODEL_PATH if kind == "image" else SENSOR_MODEL_PATH
+    if os.path.exists(path):
+        return load_model(path), path
+    if kind == "image":
+        return build_image_classifier(weights=None)[0], "standin"
+    return build_lstm_autoencoder(), "standin"
+
+def time_calls(fn, x, calls, warmup=3):
+    for _ in range(warmup):
+        fn(x)
+    times = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn(x)
+        times.append(time.perf_counter() - t0)
+    times = np.array(times) * 1000
+    return {"mean_ms": float(times.mean()), "p50_ms": float(np.percentile(times, 50)), "p99_ms": float(np.percentile(times, 99))}
+
+def run(kinds, batch_sizes, calls):
+    results = []
+    for kind in kinds:
+        model, source = load_or_standin(kind)
+        compiled = CompiledModel(model)
+        for batch_size in batch_sizes:
+            x = np.random.rand(batch_size, *model.input_shape[1:]).astype(np.float32)
+            keras_stats = time_calls(lambda b: model.predict(b, verbose=0), x, calls)
+            compiled_stats = time_calls(compiled.predict, x, calls)
+            row = {
+                "model": kind,
+                "source": source,
+                "batch_size": batch_size,
+                "keras_predict": keras_stats,
+                "compiled": compiled_stats,
+                "speedup": keras_stats["mean_ms"] / compiled_stats["mean_ms"],
+            }
+            results.append(row)
+            print(f"⏱️ {kind:<6} batch={batch_size:<3} predict={keras_stats['mean_ms']:.2f}ms "
+                  f"compiled={compiled_stats['mean_ms']:.2f}ms ({row['speedup']:.1f}x)")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark model.predict vs the compiled inference path.")
+    parser.add_argument("--models", nargs="+", choices=["image", "sensor"], default=["image", "sensor"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--output", default="benchmarks/results/inference_overhead.json")
+    args = parser.parse_args()
+
+    results = run(args.models, args.batch_sizes, args.calls)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📝 Results saved to {args.output}")
@@ -0,0 +1,326 @@
+import os
+import sys
+import io
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+# Throughput/latency suite over the project's inference and data paths:
+#   api        /predict-image/ and /predict-sensor/ in-process via TestClient, at several concurrencies
+#   infer_all  scripts/infer_all.py over a synthetic image folder (subprocess)
+#   decode     utils.image_pipeline.decode_image on 5 MP camera JPEGs and 224x224 PNGs
+#   detect     detect_anomalies.score (and optionally detect_chunked) on generate_sensor_data-style series
+#   sequences  create_sequences + batched materialization
+#   scaler     MaxScaler vs the MinMaxScaler rebuilt by detect_anomalies.load_scaler
+#   alerts     AlertDispatcher submit latency and drain time (delivery channels off)
+# Models are randomly initialized stand-ins built from utils/architectures.py,
+# so no .h5 files are needed. Every result has one headline metric; JSON
+# files from two commits can be compared with --compare.
+
+SENSOR_MAX = [3.5, 70.0, 9.5]  # Stand-in scaler data_max_, covers the generate_sensor_data ranges
+
+def result(bench, params, metric, value, higher_is_better=True, **extra):
+    row = {"bench": bench, "params": params, "metric": metric, "value": float(value), "higher_is_better": higher_is_better}
+    if extra:
+        row["extra"] = extra
+    shown = ", ".join(f"{k}={v}" for k, v in params.items())
+    print(f"⏱️ {bench:<10} {shown:<40} {metric}={value:,.2f}")
+    return row
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {"mean_ms": float(ms.mean()), "p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99))}
+
+def write_standins(workdir):
+    # models/ layout the scripts and the backend expect
+    from utils.architectures import build_image_classifier, build_lstm_autoencoder
+    models_dir = os.path.join(workdir, "models")
+    os.makedirs(models_dir, exist_ok=True)
+    build_image_classifier(weights=None)[0].save(os.path.join(models_dir, "best_model.h5"))
+    build_lstm_autoencoder().save(os.path.join(models_dir, "lstm_autoencoder.h5"))
+    np.save(os.path.join(models_dir, "lstm_scaler.npy"), np.array(SENSOR_MAX))
+    return models_dir
+
+def sensor_frame(n, seed=0):
+    # Same distributions as scripts/generate_sensor_data.py, ~9% anomalies at the end
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    n_anomaly = n // 11
+    n_normal = n - n_anomaly
+    normal = rng.normal([1.0, 37.0, 2.4], [0.05, 0.3, 0.1], size=(n_normal, 3))
+    anomaly = rng.normal([3.0, 60.0, 8.0], [0.2, 2.5, 0.5], size=(n_anomaly, 3))
+    values = np.concatenate([normal, anomaly])
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-06-01", periods=n, freq="min"),
+        "vibration": values[:, 0], "temp": values[:, 1], "pressure": values[:, 2],
+        "label": np.array(["normal"] * n_normal + ["anomaly"] * n_anomaly),
+    })
+
+def png_bytes(seed=0, size=(224, 224)):
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.fromarray(np.random.default_rng(seed).integers(0, 255, size + (3,), dtype=np.uint8)).save(buf, format="PNG")
+    return buf.getvalue()
+
+def jpeg_bytes(seed=0, size=(2592, 1944)):
+    # Camera-like frame: smooth gradients plus noise, so it compresses like a photo
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size[1], 0:size[0]]
+    base = np.stack([xx * 255 // size[0], yy * 255 // size[1], (xx + yy) * 255 // (size[0] + size[1])], axis=-1)
+    pixels = np.clip(base + rng.integers(-12, 12, base.shape), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+# === Benchmarks ===
+
+def bench_api(models_dir, concurrencies, requests):
+    os.environ.update({
+        "IMG_MODEL_PATH": os.path.join(models_dir, "best_model.h5"),
+        "SENSOR_MODEL_PATH": os.path.join(models_dir, "lstm_autoencoder.h5"),
+        "SCALER_PATH": os.path.join(models_dir, "lstm_scaler.npy"),
+    })
+    import logging
+    from fastapi.testclient import TestClient
+    import backend_api
+    logging.getLogger("backend_api").setLevel(logging.WARNING)
+
+    image = png_bytes()
+    rows = []
+    with TestClient(backend_api.app) as client:
+        deadline = time.time() + 300
+        while client.get("/health/ready").status_code != 200:
+            if time.time() > deadline:
+                raise RuntimeError("Stand-in models did not become ready")
+            time.sleep(0.5)
+
+        calls = {
+            "predict-image": lambda i: client.post("/predict-image/", files={"file": ("x.png", image, "image/png")}),
+            "predict-sensor": lambda i: client.post("/predict-sensor/", json={
+                "vibration": 1.0, "temp": 37.0, "pressure": 2.4, "machine_id": f"m{i % 64}"}),
+        }
+        for endpoint, call in calls.items():
+            for concurrency in concurrencies:
+                def timed(i):
+                    t0 = time.perf_counter()
+                    status = call(i).status_code
+                    return time.perf_counter() - t0, status
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    list(pool.map(timed, range(concurrency)))  # warm-up
+                    start = time.perf_counter()
+                    out = list(pool.map(timed, range(requests)))
+                    elapsed = time.perf_counter() - start
+                errors = sum(1 for _, status in out if status != 200)
+                rows.append(result("api", {"endpoint": endpoint, "concurrency": concurrency, "requests": requests},
+                                   "requests_per_sec", requests / elapsed, errors=errors,
+                                   **latency_summary([t for t, _ in out])))
+    return rows
+
+def bench_infer_all(workdir, n_images, batch_size):
+    from PIL import Image
+    img_dir = os.path.join(workdir, "bench_images")
+    empty_dir = os.path.join(workdir, "bench_images_empty")
+    os.makedirs(img_dir, exist_ok=True)
+    os.makedirs(empty_dir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    for i in range(n_images):
+        Image.fromarray(rng.integers(0, 255, (256, 256, 3), dtype=np.uint8)).save(os.path.join(img_dir, f"img_{i:05d}.png"))
+
+    env = dict(os.environ, EMAIL_ALERTS="off", VOICE_ALERTS="off", CONSOLE_ALERTS="off")
+    script = os.path.join(ROOT, "scripts", "infer_all.py")
+
+    def run(folder):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, "--img-dir", folder, "--batch-size", str(batch_size)],
+                       cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return time.perf_counter() - start
+
+    # The empty run measures process start-up and model load
+    startup = run(empty_dir)
+    total = run(img_dir)
+    return [result("infer_all", {"images": n_images, "batch_size": batch_size}, "images_per_sec",
+                   n_images / max(total - startup, 1e-9), total_s=total, startup_s=startup)]
+
+def bench_detect(models_dir, sizes, chunked):
+    import detect_anomalies
+    from utils.inference_backends import load_inference_model
+    from utils.scaling import load_scaler
+    model = load_inference_model(os.path.join(models_dir, "lstm_autoencoder.h5"))
+    scaler = load_scaler(os.path.join(models_dir, "lstm_scaler.npy"))
+    detect_anomalies.score(sensor_frame(1000), model, scaler)  # warm-up
+
+    rows = []
+    for n in sizes:
+        df = sensor_frame(n)
+        start = time.perf_counter()
+        detect_anomalies.score(df, model, scaler)
+        elapsed = time.perf_counter() - start
+        rows.append(result("detect", {"rows": n, "mode": "memory"}, "rows_per_sec", n / elapsed, seconds=elapsed))
+        if chunked:
+            with tempfile.TemporaryDirectory() as tmp:
+                csv_path = os.path.join(tmp, "sensor_data.csv")
+                df.to_csv(csv_path, index=False)
+                start = time.perf_counter()
+                detect_anomalies.detect_chunked(csv_path, model, scaler, os.path.join(tmp, "out.parquet"))
+                elapsed = time.perf_counter() - start
+            rows.append(result("detect", {"rows": n, "mode": "chunked"}, "rows_per_sec", n / elapsed, seconds=elapsed))
+    return rows
+
+def bench_decode(n_images):
+    from PIL import Image
+    from utils.image_pipeline import decode_image, BatchBuffer
+    rows = []
+    # draft=True is the API path, draft=False the exact load_img decode of infer_all/training
+    for name, data in {"jpeg_5mp": jpeg_bytes(), "png_224": png_bytes()}.items():
+        for draft in (True, False):
+            buffer = BatchBuffer(1)
+            decode_image(data, out=buffer.uint8[0], draft=draft)  # warm-up
+            times = []
+            for _ in range(n_images):
+                t0 = time.perf_counter()
+                decode_image(data, out=buffer.uint8[0], draft=draft)
+                buffer.normalized(1)
+                times.append(time.perf_counter() - t0)
+            with Image.open(io.BytesIO(data)) as img:
+                if draft:
+                    img.draft("RGB", (224, 224))
+                decoded_at = list(img.size)
+            rows.append(result("decode", {"image": name, "draft": draft}, "images_per_sec", n_images / sum(times),
+                               decoded_at=decoded_at, **latency_summary(times)))
+    return rows
+
+def bench_sequences(sizes, window_size=30):
+    from utils.sequences import create_sequences, iter_sequence_batches
+    rows = []
+    for n in sizes:
+        data = np.random.rand(n, 3)
+        start = time.perf_counter()
+        for batch in iter_sequence_batches(create_sequences(data, window_size)):
+            pass
+        elapsed = time.perf_counter() - start
+        rows.append(result("sequences", {"rows": n, "window_size": window_size}, "windows_per_sec",
+                           max(n - window_size, 0) / elapsed, seconds=elapsed))
+    return rows
+
+def bench_scaler(models_dir, sizes):
+    import pandas as pd
+    from detect_anomalies import load_scaler as load_minmax
+    from utils.scaling import load_scaler
+    path = os.path.join(models_dir, "lstm_scaler.npy")
+    scalers = {"MaxScaler": load_scaler(path), "MinMaxScaler": load_minmax(path)}
+    rows = []
+    for n in sizes:
+        df = pd.DataFrame(np.random.rand(n, 3) * SENSOR_MAX, columns=["vibration", "temp", "pressure"])
+        for name, scaler in scalers.items():
+            start = time.perf_counter()
+            scaler.transform(df)
+            elapsed = time.perf_counter() - start
+            rows.append(result("scaler", {"rows": n, "scaler": name}, "rows_per_sec", n / elapsed, seconds=elapsed))
+    return rows
+
+def bench_alerts(n_alerts, n_titles):
+    os.environ.update({"EMAIL_ALERTS": "off", "VOICE_ALERTS": "off", "CONSOLE_ALERTS": "off"})
+    from utils.alert_engine import AlertDispatcher
+    dispatcher = AlertDispatcher(dedup_window=60, max_per_minute=10, queue_size=n_alerts + 1)
+    dispatcher.start()
+    submit_times = []
+    start = time.perf_counter()
+    for i in range(n_alerts):
+        t0 = time.perf_counter()
+        # Distinct messages under n_titles titles, so the digest path is exercised
+        dispatcher.submit(f"Alert {i % n_titles}", f"message {i}")
+        submit_times.append(time.perf_counter() - t0)
+    dispatcher.flush()
+    elapsed = time.perf_counter() - start
+    dispatcher.stop()
+    return [result("alerts", {"alerts": n_alerts, "titles": n_titles}, "alerts_per_sec", n_alerts / elapsed,
+                   delivered=dispatcher.sent, dropped=dispatcher.dropped, submit=latency_summary(submit_times))]
+
+# === Comparison ===
+
+def compare(old_path, new_rows):
+    with open(old_path) as f:
+        old = {(r["bench"], json.dumps(r["params"], sort_keys=True)): r for r in json.load(f)["results"]}
+    print(f"\n📊 Compared with {old_path}")
+    for row in new_rows:
+        prev = old.get((row["bench"], json.dumps(row["params"], sort_keys=True)))
+        if prev is None or not prev["value"]:
+            continue
+        change = (row["value"] / prev["value"] - 1) * 100
+        better = change >= 0 if row["higher_is_better"] else change <= 0
+        shown = ", ".join(f"{k}={v}" for k, v in row["params"].items())
+        print(f"{'🟢' if better else '🔴'} {row['bench']:<10} {shown:<40} {row['metric']} {prev['value']:,.2f} → {row['value']:,.2f} ({change:+.1f}%)")
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+BENCHES = ["api", "infer_all", "decode", "detect", "sequences", "scaler", "alerts"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API, batch scripts and data paths on stand-in models.")
+    parser.add_argument("--only", nargs="+", choices=BENCHES, default=BENCHES)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--images", type=int, default=64, help="Synthetic images for infer_all and decode")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--sensor-rows", nargs="+", type=int, default=[1_000, 10_000, 100_000],
+                        help="Series lengths for detect (up to 10_000_000; large sizes take long on CPU)")
+    parser.add_argument("--chunked", action="store_true", help="Also time detect_chunked (needs pyarrow)")
+    parser.add_argument("--data-rows", nargs="+", type=int, default=[1_000, 100_000, 10_000_000],
+                        help="Series lengths for sequences and scaler")
+    parser.add_argument("--alerts", type=int, default=10_000)
+    parser.add_argument("--output", default=None, help="Default: benchmarks/results/suite-<commit>.json")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        models_dir = write_standins(workdir) if {"api", "infer_all", "detect", "scaler"} & set(args.only) else None
+        if "sequences" in args.only:
+            rows += bench_sequences(args.data_rows)
+        if "scaler" in args.only:
+            rows += bench_scaler(models_dir, args.data_rows)
+        if "alerts" in args.only:
+            rows += bench_alerts(args.alerts, n_titles=20)
+        if "decode" in args.only:
+            rows += bench_decode(args.images)
+        if "detect" in args.only:
+            rows += bench_detect(models_dir, args.sensor_rows, args.chunked)
+        if "infer_all" in args.only:
+            rows += bench_infer_all(workdir, args.images, args.batch_size)
+        if "api" in args.only:
+            rows += bench_api(models_dir, args.concurrency, args.requests)
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"suite-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    meta = {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+    }
+    try:
+        import tensorflow as tf
+        meta["tensorflow"] = tf.__version__
+    except ImportError:
+        pass
+    with open(output, "w") as f:
+        json.dump({"meta": meta, "results": rows}, f, indent=2)
+    print(f"📝 Results saved to {output}")
+    if args.compare:
+        compare(args.compare, rows)
@@ -0,0 +1,93 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+import subprocess
+import tempfile
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Training images/sec of the MobileNetV2 classifier for each combination of
+# precision (float32 / mixed_bfloat16), gradient accumulation steps and
+# number of local MultiWorkerMirroredStrategy workers, in both the frozen
+# and the fine-tune phase. Uses a randomly initialized stand-in and
+# synthetic batches, so only the compute path is measured. Every
+# configuration runs in fresh processes (the precision policy and the
+# strategy are process-global).
+
+def run_worker(config, steps, result_file):
+    # One training process of one configuration
+    import numpy as np
+    import tensorflow as tf
+    from utils.architectures import build_image_classifier
+    from utils.distributed_training import (set_precision, make_strategy, is_chief, shard_by_data,
+                                            GradientAccumulationModel, ThroughputCallback)
+
+    strategy = make_strategy("multiworker" if config["workers"] > 1 else "none")
+    set_precision(config["precision"] == "bfloat16")
+    global_batch = config["batch_size"] * config["accum_steps"] * strategy.num_replicas_in_sync
+    x = np.random.rand(global_batch, 224, 224, 3).astype(np.float32)
+    y = np.random.randint(0, 2, global_batch).astype(np.float32)
+    ds = shard_by_data(tf.data.Dataset.from_tensors((x, y)).repeat())
+
+    with strategy.scope():
+        model, base_model = build_image_classifier(weights=None)
+        base_model.trainable = config["phase"] == "finetune"
+        if config["accum_steps"] > 1:
+            model = GradientAccumulationModel(model.inputs, model.outputs, micro_batch_size=config["batch_size"])
+        model.compile(optimizer=tf.keras.optimizers.Adam(1e-4), loss="binary_crossentropy", metrics=["accuracy"])
+
+    throughput = ThroughputCallback(global_batch)
+    # Epoch 1 includes tracing and warm-up; epoch 2 is measured
+    model.fit(ds, epochs=2, steps_per_epoch=steps, callbacks=[throughput], verbose=0)
+    if is_chief():
+        with open(result_file, "w") as f:
+            json.dump({**config, "global_batch": global_batch, **throughput.epochs[-1]}, f)
+
+def run_config(config, steps):
+    from utils.distributed_training import launch_local_cluster
+    with tempfile.TemporaryDirectory() as tmp:
+        result_file = os.path.join(tmp, "result.json")
+        command = [os.path.abspath(__file__), "--worker", json.dumps(config), "--steps", str(steps), "--result-file", result_file]
+        threads = max(1, (os.cpu_count() or 1) // config["workers"])
+        if config["workers"] > 1:
+            codes = launch_local_cluster(command, config["workers"], threads_per_worker=threads)
+        else:
+            codes = [subprocess.call([sys.executable] + command)]
+        if any(codes) or not os.path.exists(result_file):
+            return {**config, "error": f"exit codes {codes}"}
+        with open(result_file) as f:
+            return json.load(f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark training throughput per precision/accumulation/worker setup.")
+    parser.add_argument("--precisions", nargs="+", choices=["float32", "bfloat16"], default=["float32", "bfloat16"])
+    parser.add_argument("--accum-steps", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--phases", nargs="+", choices=["frozen", "finetune"], default=["frozen", "finetune"])
+    parser.add_argument("--batch-size", type=int, default=32, help="Per-replica micro-batch size")
+    parser.add_argument("--steps", type=int, default=10, help="Training steps per measured epoch")
+    parser.add_argument("--output", default="benchmarks/results/training_throughput.json")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker), args.steps, args.result_file)
+        sys.exit(0)
+
+    results = []
+    for phase, precision, accum_steps, workers in itertools.product(args.phases, args.precisions, args.accum_steps, args.workers):
+        config = {"phase": phase, "precision": precision, "accum_steps": accum_steps, "workers": workers, "batch_size": args.batch_size}
+        row = run_config(config, args.steps)
+        results.append(row)
+        if "error" in row:
+            print(f"❌ {phase:<8} {precision:<8} accum={accum_steps} workers={workers}: {row['error']}")
+        else:
+            print(f"⚡ {phase:<8} {precision:<8} accum={accum_steps} workers={workers}: "
+                  f"{row['images_per_sec']:.1f} images/sec (batch {row['global_batch']})")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📝 Results saved to {args.output}")
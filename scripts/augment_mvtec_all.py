@@ -1,3 +1,6 @@
+# Writes AUGMENT_COUNT frozen augmented copies of every image to disk.
+# train_cnn.py now augments on the fly (utils/augmentation.py, same ranges),
+# so this is only needed to inspect augmented samples.
 import os
 from tensorflow.keras.preprocessing.image import ImageDataGenerator, load_img, img_to_array
 
@@ -18,7 +21,7 @@ datagen = ImageDataGenerator(
     fill_mode='nearest'
 )
 
-def augment_folder(src_folder, dst_folder):
+def augment_folder(src_folder, dst_folder, lineage):
     os.makedirs(dst_folder, exist_ok=True)
     files = [f for f in os.listdir(src_folder) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
     total = 0
@@ -29,11 +32,13 @@ def augment_folder(src_folder, dst_folder):
             img = load_img(img_path)
             x = img_to_array(img)
             x = x.reshape((1,) + x.shape)
+            # File names carry the source image (category, MVTec split, defect, image)
+            # so utils/dataset_index.py can group copies of one source
             base = os.path.splitext(file)[0]
 
             for i, batch in enumerate(datagen.flow(x, batch_size=1,
                                                    save_to_dir=dst_folder,
-                                                   save_prefix=f"aug_{base}",
+                                                   save_prefix=f"aug_{lineage}_{base}",
                                                    save_format='png')):
                 if i >= AUGMENT_COUNT:
                     break
@@ -53,7 +58,7 @@ for category in os.listdir(ROOT):
     train_good = os.path.join(cat_path, 'train', 'good')
     if os.path.exists(train_good):
         print(f"🚀 Augmenting: {category}/train/good")
-        augment_folder(train_good, os.path.join(TARGET, 'train', 'Good'))
+        augment_folder(train_good, os.path.join(TARGET, 'train', 'Good'), f"{category}_train_good")
 
     # Test/defective
     test_path = os.path.join(cat_path, 'test')
@@ -62,6 +67,6 @@ for category in os.listdir(ROOT):
             defect_path = os.path.join(test_path, defect_type)
             if defect_type.lower() != "good" and os.path.isdir(defect_path):
                 print(f"🚨 Augmenting: {category}/test/{defect_type}")
-                augment_folder(defect_path, os.path.join(TARGET, 'train', 'Defective'))
+                augment_folder(defect_path, os.path.join(TARGET, 'train', 'Defective'), f"{category}_test_{defect_type}")
 
 print("\n🎉 DONE: All MVTec images augmented into D:\\Smart_factory_ai\\augmented")
@@ -1,16 +1,31 @@
-from fastapi import FastAPI, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, File, UploadFile, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
+from typing import List, Optional
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 import io
-from PIL import Image
 import uvicorn
 import os
+import sys
+import time
+import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.micro_batcher import MicroBatcher
+from utils.sensor_buffers import SensorWindowStore, windows_for
+from utils.model_slots import ModelSlot, ModelNotReady
+from utils.scaling import load_scaler
+from utils.inference_backends import load_inference_model, model_version, INFERENCE_BACKEND
+from utils.image_pipeline import decode_image, normalize
+from utils.metrics import Registry, BATCH_BUCKETS
+from utils.sampling_profiler import SamplingProfiler
+from utils.prediction_cache import PredictionCache, content_key
+from utils import model_registry
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
@@ -19,25 +34,180 @@ logger = logging.getLogger(__name__)
 # Load dotenv
 load_dotenv()
 
-# Load models with error handling
-try:
-    IMG_MODEL_PATH = os.getenv("IMG_MODEL_PATH", "models/best_model.h5")
-    SENSOR_MODEL_PATH = os.getenv("SENSOR_MODEL_PATH", "models/lstm_autoencoder.h5")
-    SCALER_PATH = os.getenv("SCALER_PATH", "models/lstm_scaler.npy")
-
-    img_model = load_model(IMG_MODEL_PATH)
-    sensor_model = load_model(SENSOR_MODEL_PATH)
-    scaler_max = np.load(SCALER_PATH)
-except Exception as e:
-    logger.error(f"Error loading models: {e}")
-    raise RuntimeError(f"Model loading failed: {e}")
-
-from sklearn.preprocessing import MinMaxScaler
-scaler = MinMaxScaler()
-scaler.fit(np.zeros((1, 3)))
-scaler.scale_ = 1.0 / scaler_max
-scaler.min_ = 0
-scaler.data_max_ = scaler_max
+IMG_MODEL_PATH = os.getenv("IMG_MODEL_PATH", "models/best_model.h5")
+SENSOR_MODEL_PATH = os.getenv("SENSOR_MODEL_PATH", "models/lstm_autoencoder.h5")
+SCALER_PATH = os.getenv("SCALER_PATH", "models/lstm_scaler.npy")
+# Versioned image model registry (utils/model_registry.py). When set, the
+# image model is served from the registry's "production" alias instead of
+# IMG_MODEL_PATH, and the registry is polled for alias changes: a new
+# production version is loaded and warmed up in the background and swapped
+# in between batches; a "candidate" version is scored on CANDIDATE_FRACTION
+# of the batches, either in the shadow of production (responses unchanged)
+# or as a canary (its predictions are served).
+MODEL_REGISTRY = os.getenv("MODEL_REGISTRY") or None
+MODEL_REGISTRY_POLL = float(os.getenv("MODEL_REGISTRY_POLL", 10))
+CANDIDATE_MODE = os.getenv("CANDIDATE_MODE", "shadow")
+CANDIDATE_FRACTION = float(os.getenv("CANDIDATE_FRACTION", 0.0))
+if CANDIDATE_MODE not in ("shadow", "canary"):
+    raise RuntimeError(f"CANDIDATE_MODE must be 'shadow' or 'canary', got {CANDIDATE_MODE!r}")
+if MODEL_REGISTRY:
+    _, registry_path = model_registry.resolve(MODEL_REGISTRY, "image", "production")
+    IMG_MODEL_PATH = registry_path or IMG_MODEL_PATH
+# Which models this replica serves: "image", "sensor" or both
+SERVE_MODELS = [m.strip() for m in os.getenv("SERVE_MODELS", "image,sensor").split(",") if m.strip()]
+if not SERVE_MODELS or set(SERVE_MODELS) - {"image", "sensor"}:
+    raise RuntimeError(f"SERVE_MODELS must list 'image' and/or 'sensor', got {SERVE_MODELS}")
+
+# Micro-batching for /predict-image/: requests arriving within the window are
+# classified together in one forward pass, off the event loop
+IMG_BATCH_WINDOW_MS = float(os.getenv("IMG_BATCH_WINDOW_MS", 5))
+IMG_MAX_BATCH_SIZE = int(os.getenv("IMG_MAX_BATCH_SIZE", 16))
+
+# Per-machine sliding windows for /predict-sensor/
+WINDOW_SIZE = int(os.getenv("WINDOW_SIZE", 30))
+ANOMALY_THRESHOLD = float(os.getenv("ANOMALY_THRESHOLD", 0.001))
+MAX_TRACKED_MACHINES = int(os.getenv("MAX_TRACKED_MACHINES", 10000))
+SENSOR_PREDICT_BATCH = int(os.getenv("SENSOR_PREDICT_BATCH", 1024))
+sensor_windows = SensorWindowStore(window_size=WINDOW_SIZE, n_features=3, max_streams=MAX_TRACKED_MACHINES)
+
+# Cache of /predict-image/ results keyed by upload content hash and model
+# version. PREDICTION_CACHE_DB adds a SQLite tier shared by all workers.
+PREDICTION_CACHE = os.getenv("PREDICTION_CACHE", "off") == "on"
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", 3600))
+PREDICTION_CACHE_DB = os.getenv("PREDICTION_CACHE_DB") or None
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_DB) if PREDICTION_CACHE else None
+
+# Allows the /debug/profiler endpoints to start the sampling profiler at runtime
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "off") == "on"
+
+# === Metrics (GET /metrics, Prometheus text format) ===
+metrics = Registry()
+REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route and status code", ("endpoint", "status"))
+REQUEST_LATENCY = metrics.histogram("http_request_duration_seconds", "End-to-end request latency by route", ("endpoint",))
+STAGE_LATENCY = metrics.histogram("stage_duration_seconds", "Latency of each processing stage by route", ("endpoint", "stage"))
+IMAGE_BATCH_SIZE = metrics.histogram("image_batch_size", "Images per micro-batched forward pass", buckets=BATCH_BUCKETS)
+SENSOR_BATCH_SIZE = metrics.histogram("sensor_batch_windows", "Windows per sensor scoring call by route", ("endpoint",), buckets=BATCH_BUCKETS)
+PREDICTIONS = metrics.counter("predictions_total", "Predictions by route and outcome (Good/Defective, normal/anomaly)", ("endpoint", "outcome"))
+# role: production, canary (candidate serving) or shadow (candidate scored alongside production)
+MODEL_PREDICT_LATENCY = metrics.histogram("image_model_predict_seconds", "Image model forward pass latency by role", ("role",))
+MODEL_OUTCOMES = metrics.counter("image_model_predictions_total", "Image model outcomes by role (Good/Defective)", ("role", "outcome"))
+SHADOW_DIFF = metrics.histogram("shadow_abs_diff", "Absolute difference between candidate and production scores",
+                                buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0))
+SHADOW_DISAGREEMENTS = metrics.counter("shadow_label_disagreements_total", "Shadow-scored images whose label differs from production")
+
+def stage(endpoint, name):
+    return STAGE_LATENCY.time(endpoint=endpoint, stage=name)
+
+# Models load and warm up on background threads after startup, so the
+# process accepts connections (and answers liveness) straight away
+def warmup_image_model(model):
+    # Trace the single-image and full micro-batch shapes before traffic arrives
+    for batch_size in sorted({1, IMG_MAX_BATCH_SIZE}):
+        model.predict(np.zeros((batch_size, 224, 224, 3), dtype=np.float32), verbose=0)
+
+def warmup_sensor_model(model):
+    model.predict(np.zeros((1, WINDOW_SIZE, 3), dtype=np.float32), verbose=0)
+
+# INFERENCE_BACKEND=tflite (or a .tflite path) serves the exported TFLite models
+img_slot = ModelSlot("image", IMG_MODEL_PATH, warmup_fn=warmup_image_model, load_fn=load_inference_model,
+                     version_fn=model_version)
+sensor_slot = ModelSlot("sensor", SENSOR_MODEL_PATH, warmup_fn=warmup_sensor_model, load_fn=load_inference_model)
+model_slots = {"image": img_slot, "sensor": sensor_slot}
+# Registry candidate; not part of readiness
+candidate_slot = ModelSlot("image-candidate", None, warmup_fn=warmup_image_model, load_fn=load_inference_model,
+                           version_fn=model_version)
+
+scaler = None
+if "sensor" in SERVE_MODELS:
+    try:
+        scaler = load_scaler(SCALER_PATH)
+    except Exception as e:
+        logger.error(f"Error loading scaler: {e}")
+        raise RuntimeError(f"Scaler loading failed: {e}")
+
+# Model input buffer, reused by every batch (the batcher runs one batch at a time)
+img_input = np.empty((IMG_MAX_BATCH_SIZE, 224, 224, 3), dtype=np.float32)
+
+# Shadow scoring runs on its own thread so it never delays responses; at
+# most one batch waits for it; others are not shadowed
+shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+shadow_slots = threading.Semaphore(2)
+
+def timed_predict(model, x, role):
+    t0 = time.perf_counter()
+    preds = model.predict(x, verbose=0)[:, 0]
+    MODEL_PREDICT_LATENCY.observe(time.perf_counter() - t0, role=role)
+    for outcome, n in zip(("Defective", "Good"), np.bincount(preds > 0.5, minlength=2)):
+        if n:
+            MODEL_OUTCOMES.inc(int(n), role=role, outcome=outcome)
+    return preds
+
+def shadow_score(model, x, production_preds):
+    try:
+        preds = timed_predict(model, x, "shadow")
+        for diff in np.abs(preds - production_preds):
+            SHADOW_DIFF.observe(float(diff))
+        disagreements = int(np.sum((preds > 0.5) != (production_preds > 0.5)))
+        if disagreements:
+            SHADOW_DISAGREEMENTS.inc(disagreements)
+    except Exception as e:
+        logger.error(f"Shadow scoring error: {e}")
+    finally:
+        shadow_slots.release()
+
+def predict_image_batch(batch):
+    # batch: stacked uint8 images, rescaled to [0, 1] into the shared buffer.
+    # Returns (score, model version) per image; the model is looked up once,
+    # so a hot swap takes effect between batches, never within one.
+    x = normalize(batch, out=img_input[:len(batch)])
+    model, version = img_slot.require_versioned()
+    try:
+        # Captured once: the watcher may unload the candidate at any time
+        candidate = candidate_slot.require_versioned()
+    except ModelNotReady:
+        candidate = None
+    use_candidate = candidate is not None and random.random() < CANDIDATE_FRACTION
+    if use_candidate and CANDIDATE_MODE == "canary":
+        model, version = candidate
+        preds = timed_predict(model, x, "canary")
+    else:
+        preds = timed_predict(model, x, "production")
+        if use_candidate and shadow_slots.acquire(blocking=False):
+            shadow_executor.submit(shadow_score, candidate[0], x.copy(), preds)
+    return [(float(p), version) for p in preds]
+
+def record_image_batch(batch_size, queue_waits, predict_seconds):
+    IMAGE_BATCH_SIZE.observe(batch_size)
+    for wait in queue_waits:
+        STAGE_LATENCY.observe(wait, endpoint="/predict-image/", stage="queue_wait")
+    STAGE_LATENCY.observe(predict_seconds, endpoint="/predict-image/", stage="predict")
+
+img_batcher = MicroBatcher(predict_image_batch, max_batch_size=IMG_MAX_BATCH_SIZE, window_ms=IMG_BATCH_WINDOW_MS,
+                           on_batch=record_image_batch)
+
+metrics.gauge("image_queue_depth", "Images waiting for the micro-batcher", fn=lambda: {(): img_batcher.depth()})
+metrics.gauge("tracked_machines", "Machines with a buffered sensor window", fn=lambda: {(): len(sensor_windows)})
+metrics.gauge("model_ready", "1 once the model is loaded and warmed up", ("model",),
+              fn=lambda: {(name,): int(model_slots[name].state == "ready") for name in SERVE_MODELS})
+metrics.gauge("model_load_seconds", "Time spent loading the model", ("model",),
+              fn=lambda: {(name,): model_slots[name].load_seconds for name in SERVE_MODELS})
+metrics.gauge("model_warmup_seconds", "Time spent warming up the model", ("model",),
+              fn=lambda: {(name,): model_slots[name].warmup_seconds for name in SERVE_MODELS})
+metrics.gauge("image_model_version", "1 for the image model version serving each role", ("role", "version"),
+              fn=lambda: {(role, slot.version): 1 for role, slot in (("production", img_slot), ("candidate", candidate_slot))
+                          if slot.version is not None})
+
+if prediction_cache is not None:
+    metrics.counter("prediction_cache_requests_total", "Image prediction cache lookups by result", ("result",),
+                    fn=lambda: {("hit_memory",): prediction_cache.hits["memory"], ("hit_sqlite",): prediction_cache.hits["sqlite"],
+                                ("miss",): prediction_cache.misses})
+    metrics.gauge("prediction_cache_entries", "Entries in the in-memory prediction cache", fn=lambda: {(): len(prediction_cache)})
+
+profiler = SamplingProfiler()
+
+def not_ready_response(e):
+    return JSONResponse(status_code=503, content={"error": str(e)})
 
 app = FastAPI(title="Smart Factory AI Backend", description="API for image and sensor anomaly detection.")
 
@@ -50,25 +220,117 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not the raw path, to keep label cardinality bounded
+    route = request.scope.get("route")
+    endpoint = route.path if route is not None else "unmatched"
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    REQUEST_LATENCY.observe(time.perf_counter() - t0, endpoint=endpoint)
+    return response
+
+# === Registry watcher ===
+registry_stop = threading.Event()
+registry_attempted = {}  # alias -> last version handed to a slot, so failed loads are not retried every poll
+
+def sync_registry():
+    aliases = model_registry.read_aliases(MODEL_REGISTRY, "image")
+    for alias, slot in (("production", img_slot), ("candidate", candidate_slot)):
+        version = aliases.get(alias)
+        if alias == "candidate" and (CANDIDATE_FRACTION <= 0 or version == aliases.get("production")):
+            version = None
+        if version is None:
+            if alias == "candidate" and slot.model is not None:
+                slot.unload()
+                logger.info("Candidate image model unloaded")
+            registry_attempted.pop(alias, None)
+            continue
+        path = model_registry.model_path(MODEL_REGISTRY, "image", version)
+        if path == slot.path or registry_attempted.get(alias) == version:
+            continue
+        bad = model_registry.verify(MODEL_REGISTRY, "image", version)
+        registry_attempted[alias] = version
+        if bad:
+            logger.error(f"Registry image {version} failed checksum verification: {bad}")
+            continue
+        if slot.reload(path):
+            logger.info(f"Loading image {alias} {version} from the registry")
+        else:
+            registry_attempted.pop(alias, None)  # A load is still running; try again next poll
+
+def watch_registry():
+    while not registry_stop.wait(MODEL_REGISTRY_POLL):
+        try:
+            sync_registry()
+        except Exception as e:
+            logger.error(f"Model registry poll failed: {e}")
+
+@app.on_event("startup")
+async def start_models():
+    for name in SERVE_MODELS:
+        model_slots[name].start()
+    img_batcher.start()
+    if MODEL_REGISTRY and "image" in SERVE_MODELS:
+        threading.Thread(target=watch_registry, name="registry-watch", daemon=True).start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    registry_stop.set()
+    await img_batcher.stop()
+    shadow_executor.shutdown(wait=False)
+
 class SensorData(BaseModel):
     vibration: float
     temp: float
     pressure: float
+    machine_id: Optional[str] = None  # Omit for stateless (single reading) scoring
+
+class BulkSensorData(BaseModel):
+    # Column arrays, one entry per reading, in arrival order
+    vibration: List[float]
+    temp: List[float]
+    pressure: List[float]
+    machine_id: Optional[str] = None  # Applies to every reading
+    machine_ids: Optional[List[str]] = None  # One per reading, overrides machine_id
+
+def preprocess_image(contents):
+    # Draft-mode decode straight to 224x224 uint8; rescaling happens per batch
+    with stage("/predict-image/", "decode"):
+        return decode_image(contents, (224, 224), draft=True)
+
+def cached_prediction(contents, version):
+    # Hashing a camera upload and the SQLite tier both block, so this runs in the threadpool
+    key = content_key(contents)
+    prediction_cache.set_version(version)
+    return key, prediction_cache.get(key)
 
 @app.post("/predict-image/", summary="Predict image quality", description="Classifies an uploaded image as Good or Defective.")
 async def predict_image(file: UploadFile = File(...)):
     try:
-        contents = await file.read()
-        img = Image.open(io.BytesIO(contents)).convert("RGB")
-        img = img.resize((224, 224))
-        x = image.img_to_array(img)
-        x = np.expand_dims(x, axis=0)
-        x = x / 255.0
-        pred = img_model.predict(x, verbose=0)[0][0]
+        img_slot.require()
+        version = img_slot.version
+        with stage("/predict-image/", "read"):
+            contents = await file.read()
+        pred = None
+        if prediction_cache is not None:
+            with stage("/predict-image/", "cache_lookup"):
+                key, pred = await run_in_threadpool(cached_prediction, contents, version)
+        if pred is None:
+            x = await run_in_threadpool(preprocess_image, contents)
+            pred, served_version = await img_batcher.submit(x)
+            if prediction_cache is not None:
+                # Dropped by the cache unless production served it
+                await run_in_threadpool(prediction_cache.put, key, pred, served_version)
         label = "Good" if pred > 0.5 else "Defective"
         confidence = float(pred if label == "Good" else 1 - pred)
+        PREDICTIONS.inc(endpoint="/predict-image/", outcome=label)
         logger.info(f"Image prediction: label={label}, confidence={confidence}")
-        return {"label": label, "confidence": confidence}
+        with stage("/predict-image/", "serialize"):
+            return JSONResponse(content={"label": label, "confidence": confidence})
+    except ModelNotReady as e:
+        return not_ready_response(e)
     except Exception as e:
         logger.error(f"Image prediction error: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -76,19 +338,187 @@ async def predict_image(file: UploadFile = File(...)):
 @app.post("/predict-sensor/", summary="Detect sensor anomaly", description="Detects anomalies in sensor data using an LSTM autoencoder.")
 async def predict_sensor(data: SensorData):
     try:
-        features = np.array([[data.vibration, data.temp, data.pressure]])
-        features_scaled = scaler.transform(features)
-        window_size = int(os.getenv("WINDOW_SIZE", 30))
-        seq = np.repeat(features_scaled[np.newaxis, :, :], window_size, axis=1)
-        recon = sensor_model.predict(seq, verbose=0)
+        endpoint = "/predict-sensor/"
+        sensor_model = sensor_slot.require()
+        with stage(endpoint, "scale"):
+            features = np.array([[data.vibration, data.temp, data.pressure]])
+            features_scaled = scaler.transform(features)
+        with stage(endpoint, "window"):
+            if data.machine_id is None:
+                seq = np.repeat(features_scaled[np.newaxis, :, :], WINDOW_SIZE, axis=1)
+                window_fill = 1
+            else:
+                window, window_fill = sensor_windows.append(data.machine_id, features_scaled[0])
+                seq = window[np.newaxis, :, :]
+        with stage(endpoint, "predict"):
+            recon = sensor_model.predict(seq, verbose=0)
         error = float(np.mean((seq - recon) ** 2))
-        threshold = float(os.getenv("ANOMALY_THRESHOLD", 0.001))
-        is_anomaly = error > threshold
-        logger.info(f"Sensor prediction: anomaly={is_anomaly}, error={error}")
-        return {"anomaly": is_anomaly, "reconstruction_error": error}
+        is_anomaly = error > ANOMALY_THRESHOLD
+        PREDICTIONS.inc(endpoint=endpoint, outcome="anomaly" if is_anomaly else "normal")
+        logger.info(f"Sensor prediction: machine={data.machine_id}, anomaly={is_anomaly}, error={error}")
+        with stage(endpoint, "serialize"):
+            return JSONResponse(content={"anomaly": bool(is_anomaly), "reconstruction_error": error, "window_fill": int(window_fill)})
+    except ModelNotReady as e:
+        return not_ready_response(e)
     except Exception as e:
         logger.error(f"Sensor prediction error: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+def score_sensor_bulk(readings, machine_id=None, machine_ids=None, endpoint="/predict-sensor-bulk/"):
+    # Scores every reading against the window ending at it. Readings are
+    # grouped per machine, each group is windowed with a strided view over
+    # the machine's buffered history, and all windows go through one predict.
+    # Readings without any machine ID form one unbuffered series.
+    with stage(endpoint, "scale"):
+        readings_scaled = scaler.transform(readings).astype(np.float32)
+    n = len(readings_scaled)
+    if machine_ids is None:
+        groups = [(machine_id, np.arange(n))]
+    else:
+        ids, inverse = np.unique(np.asarray(machine_ids), return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        splits = np.cumsum(np.bincount(inverse, minlength=len(ids)))[:-1]
+        groups = zip(ids.tolist(), np.split(order, splits))
+
+    windows, fills, positions = [], [], []
+    with stage(endpoint, "window"):
+        for stream_id, idx in groups:
+            rows = readings_scaled[idx]
+            if stream_id is None:
+                history, seen = rows[:0], 0
+            else:
+                history, seen = sensor_windows.extend(stream_id, rows)
+            windows.append(windows_for(history, rows, WINDOW_SIZE))
+            fills.append(np.minimum(seen + np.arange(1, len(idx) + 1), WINDOW_SIZE))
+            positions.append(idx)
+        seqs = np.concatenate(windows) if len(windows) > 1 else np.ascontiguousarray(windows[0])
+
+    SENSOR_BATCH_SIZE.observe(len(seqs), endpoint=endpoint)
+    with stage(endpoint, "predict"):
+        recon = sensor_slot.require().predict(seqs, batch_size=SENSOR_PREDICT_BATCH, verbose=0)
+    errors = np.empty(n, dtype=np.float64)
+    window_fill = np.empty(n, dtype=np.int64)
+    order = np.concatenate(positions)
+    errors[order] = np.mean((seqs - recon) ** 2, axis=(1, 2))
+    window_fill[order] = np.concatenate(fills)
+    return errors, window_fill
+
+def bulk_response(errors, window_fill, endpoint):
+    anomaly = errors > ANOMALY_THRESHOLD
+    n_anomalies = int(np.sum(anomaly))
+    if n_anomalies:
+        PREDICTIONS.inc(n_anomalies, endpoint=endpoint, outcome="anomaly")
+    if len(errors) - n_anomalies:
+        PREDICTIONS.inc(len(errors) - n_anomalies, endpoint=endpoint, outcome="normal")
+    with stage(endpoint, "serialize"):
+        return JSONResponse(content={
+            "count": int(len(errors)),
+            "reconstruction_error": errors.tolist(),
+            "anomaly": anomaly.tolist(),
+            "window_fill": window_fill.tolist(),
+        })
+
+@app.post("/predict-sensor-bulk/", summary="Detect sensor anomalies in bulk", description="Scores many readings for many machines in one request.")
+async def predict_sensor_bulk(data: BulkSensorData):
+    try:
+        sensor_slot.require()
+        if not len(data.vibration) == len(data.temp) == len(data.pressure):
+            return JSONResponse(status_code=400, content={"error": f"vibration, temp and pressure must have the same length, got {len(data.vibration)}, {len(data.temp)} and {len(data.pressure)}"})
+        readings = np.column_stack([data.vibration, data.temp, data.pressure])
+        if data.machine_ids is not None and len(data.machine_ids) != len(readings):
+            return JSONResponse(status_code=400, content={"error": "machine_ids must have one entry per reading"})
+        if len(readings) == 0:
+            return bulk_response(np.empty(0), np.empty(0, dtype=np.int64), "/predict-sensor-bulk/")
+        errors, window_fill = await run_in_threadpool(score_sensor_bulk, readings, data.machine_id, data.machine_ids)
+        logger.info(f"Bulk sensor prediction: readings={len(errors)}, anomalies={int(np.sum(errors > ANOMALY_THRESHOLD))}")
+        return bulk_response(errors, window_fill, "/predict-sensor-bulk/")
+    except ModelNotReady as e:
+        return not_ready_response(e)
+    except Exception as e:
+        logger.error(f"Bulk sensor prediction error: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.post("/predict-sensor-bulk-npy/", summary="Detect sensor anomalies from an NPY upload", description="Scores an (N, 3) .npy array of vibration/temp/pressure readings for one machine.")
+async def predict_sensor_bulk_npy(file: UploadFile = File(...), machine_id: Optional[str] = None):
+    try:
+        endpoint = "/predict-sensor-bulk-npy/"
+        sensor_slot.require()
+        with stage(endpoint, "read"):
+            contents = await file.read()
+            try:
+                readings = np.load(io.BytesIO(contents), allow_pickle=False)
+            except (ValueError, OSError, EOFError) as e:
+                return JSONResponse(status_code=400, content={"error": f"not a readable .npy array (object arrays are not accepted): {e}"})
+        if not isinstance(readings, np.ndarray) or readings.ndim != 2 or readings.shape[1] != 3:
+            return JSONResponse(status_code=400, content={"error": f"expected an (N, 3) array, got {getattr(readings, 'shape', type(readings).__name__)}"})
+        if not (np.issubdtype(readings.dtype, np.integer) or np.issubdtype(readings.dtype, np.floating)):
+            return JSONResponse(status_code=400, content={"error": f"expected numeric readings, got dtype {readings.dtype}"})
+        if len(readings) == 0:
+            return bulk_response(np.empty(0), np.empty(0, dtype=np.int64), endpoint)
+        errors, window_fill = await run_in_threadpool(score_sensor_bulk, readings, machine_id, None, endpoint)
+        logger.info(f"Bulk sensor prediction (npy): machine={machine_id}, readings={len(errors)}")
+        return bulk_response(errors, window_fill, endpoint)
+    except ModelNotReady as e:
+        return not_ready_response(e)
+    except Exception as e:
+        logger.error(f"Bulk sensor prediction error: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.delete("/sensor-window/{machine_id}", summary="Reset sensor window", description="Drops the buffered readings for one machine.")
+async def reset_sensor_window(machine_id: str):
+    sensor_windows.reset(machine_id)
+    return {"machine_id": machine_id, "reset": True}
+
+@app.get("/health/live", summary="Liveness", description="The process is up and serving HTTP.")
+async def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready", summary="Readiness", description="Every model this replica serves is loaded and warmed up.")
+async def health_ready():
+    models = {name: model_slots[name].status() for name in SERVE_MODELS}
+    ready = all(m["state"] == "ready" for m in models.values())
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "backend": INFERENCE_BACKEND, "models": models})
+
+@app.get("/models", summary="Image model versions", description="Registry aliases, the serving and candidate model, and the candidate scoring setup.")
+async def models_status():
+    return {
+        "registry": MODEL_REGISTRY,
+        "aliases": model_registry.read_aliases(MODEL_REGISTRY, "image") if MODEL_REGISTRY else {},
+        "production": img_slot.status(),
+        "candidate": candidate_slot.status(),
+        "candidate_mode": CANDIDATE_MODE,
+        "candidate_fraction": CANDIDATE_FRACTION,
+    }
+
+@app.post("/models/sync", summary="Check the model registry now", description="Applies alias changes without waiting for the next poll.")
+async def models_sync():
+    if not MODEL_REGISTRY:
+        return JSONResponse(status_code=400, content={"error": "MODEL_REGISTRY is not set"})
+    await run_in_threadpool(sync_registry)
+    return await models_status()
+
+@app.get("/metrics", summary="Metrics", description="Prometheus text-format counters, gauges and latency histograms.")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/debug/profiler/start", summary="Start the sampling profiler", description="Requires PROFILER_ENABLED=on. Samples every thread's stack until duration_s has passed.")
+async def start_profiler(interval_ms: float = 10.0, duration_s: float = 30.0):
+    if not PROFILER_ENABLED:
+        return JSONResponse(status_code=403, content={"error": "Set PROFILER_ENABLED=on to allow profiling"})
+    if not profiler.start(interval_ms, duration_s):
+        return JSONResponse(status_code=409, content={"error": "Profiler is already running"})
+    return profiler.status()
+
+@app.post("/debug/profiler/stop", summary="Stop the sampling profiler")
+async def stop_profiler():
+    await run_in_threadpool(profiler.stop)
+    return profiler.status()
+
+@app.get("/debug/profiler", summary="Profiler results", description="Top frames as JSON, or format=collapsed for flamegraph input.")
+async def profiler_results(format: str = "json"):
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed())
+    return profiler.status()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
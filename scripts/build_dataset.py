@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dataset_builder import plan_merge, plan_split, build
+
+# Build dataset/{train,val}/{Good,Defective} in one command, either from the
+# raw MVTec AD tree (merge) or from the augmented images (split). Files are
+# hard-linked where possible and copied in parallel otherwise; manifest.csv in
+# the output dir makes reruns incremental. Both modes can target the same
+# output dir: a rerun of one only removes files that mode placed.
+
+parser = argparse.ArgumentParser(description="Build the train/val image dataset with hard links and a manifest.")
+sub = parser.add_subparsers(dest="mode", required=True)
+merge = sub.add_parser("merge", help="MVTec AD → dataset (train/good, test/good, test/<defect>)")
+merge.add_argument("--mvtec-root", default=r"D:\MVTecAD")
+split = sub.add_parser("split", help="Augmented Good/Defective → seeded train/val split")
+split.add_argument("--input", default=r"D:\Smart_factory_ai\augmented\train")
+split.add_argument("--classes", nargs="+", default=["Good", "Defective"])
+split.add_argument("--ratio", type=float, default=0.8, help="Fraction of each class that goes to train")
+split.add_argument("--seed", type=int, default=42)
+for p in (merge, split):
+    p.add_argument("--output", default=r"D:\Smart_factory_ai\dataset")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--copy", action="store_true", help="Always copy instead of hard-linking")
+args = parser.parse_args()
+
+start = time.time()
+if args.mode == "merge":
+    plan = plan_merge(args.mvtec_root)
+else:
+    plan = plan_split(args.input, args.classes, args.ratio, args.seed)
+counts = build(plan, args.output, owner=args.mode, workers=args.workers, use_links=not args.copy)
+
+for (split_name, cls), n in sorted(Counter((s, c) for _, s, c, _ in plan).items()):
+    print(f"✅ {split_name}/{cls}: {n} images")
+print(f"📂 {len(plan)} files: {counts['link']} linked, {counts['copy']} copied, "
+      f"{counts['unchanged']} unchanged, {counts['removed']} removed in {time.time() - start:.1f}s")
+print("\n🎉 Dataset is ready at:", args.output)
@@ -0,0 +1,39 @@
+import os
+import sys
+import time
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dataset_cache import build_cache, list_split, fingerprint, read_index
+
+# Compile dataset/train and dataset/val into the preprocess-once cache used by
+# train_cnn.py, resume_finetune.py and evaluate_model.py. The training scripts
+# build a stale cache themselves; running this first keeps that out of the
+# training job.
+
+parser = argparse.ArgumentParser(description="Build the resized uint8 image cache for each dataset split.")
+parser.add_argument("--dataset-dir", default="dataset")
+parser.add_argument("--cache-dir", default=None, help="Default: <dataset-dir>_cache")
+parser.add_argument("--splits", nargs="+", default=["train", "val"])
+parser.add_argument("--image-size", type=int, nargs=2, default=[224, 224])
+parser.add_argument("--shard-size", type=int, default=2048, help="Images per .npy shard")
+parser.add_argument("--workers", type=int, default=None)
+parser.add_argument("--force", action="store_true", help="Rebuild even if the cache is up to date")
+args = parser.parse_args()
+
+cache_dir = args.cache_dir or args.dataset_dir.rstrip("/\\") + "_cache"
+image_size = tuple(args.image_size)
+
+for split in args.splits:
+    split_dir = os.path.join(args.dataset_dir, split)
+    split_cache = os.path.join(cache_dir, split)
+    _, paths, _ = list_split(split_dir)
+    if not paths:
+        print(f"⚠️ {split}: no images in {split_dir}, skipped")
+        continue
+    index = read_index(split_cache)
+    if not args.force and index is not None and index["fingerprint"] == fingerprint(split_dir, paths, image_size):
+        print(f"✅ {split}: cache is up to date ({index['count']} images)")
+        continue
+    start = time.time()
+    index = build_cache(split_dir, split_cache, image_size, args.shard_size, args.workers, force=True)
+    print(f"✅ {split}: {index['count']} images cached in {time.time() - start:.1f}s → {split_cache}")
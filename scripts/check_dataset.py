@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dataset_index import (build_index, connect, leaked_sources, duplicate_hashes,
+                                 class_balance, category_counts, unknown_lineage)
+
+# Refresh dataset/index.sqlite and report class balance, per-category counts
+# and train/val leakage (same source image, or near-identical perceptual
+# hash, in more than one split). Exits with status 1 on leakage when
+# --fail-on-leak is set, so it can gate training.
+
+parser = argparse.ArgumentParser(description="Index the dataset and check it for train/val leakage.")
+parser.add_argument("--dataset-dir", default="dataset")
+parser.add_argument("--workers", type=int, default=None)
+parser.add_argument("--force", action="store_true", help="Re-hash every image")
+parser.add_argument("--max-distance", type=int, default=0, help="Perceptual hash bits that may differ for a duplicate")
+parser.add_argument("--categories", action="store_true", help="Print per-category counts")
+parser.add_argument("--fail-on-leak", action="store_true")
+parser.add_argument("--show", type=int, default=10, help="Leaks to list per check")
+args = parser.parse_args()
+
+start = time.time()
+total, hashed = build_index(args.dataset_dir, args.workers, args.force)
+print(f"🗂️ Indexed {total} images ({hashed} hashed) in {time.time() - start:.1f}s")
+
+conn = connect(args.dataset_dir)
+for split, cls, n in class_balance(conn):
+    print(f"📊 {split}/{cls}: {n}")
+if args.categories:
+    for category, split, cls, n in category_counts(conn):
+        print(f"   {category or '(unknown)':<12} {split}/{cls}: {n}")
+
+unknown = unknown_lineage(conn)
+if unknown:
+    print(f"⚠️ {unknown} images have no known source; only their perceptual hashes are checked")
+
+leaks = leaked_sources(conn)
+dupes = duplicate_hashes(conn, args.max_distance)
+conn.close()
+for source_id, splits, n in leaks[:args.show]:
+    print(f"🚨 {source_id}: {n} images across {splits}")
+for a, b, d in dupes[:args.show]:
+    print(f"🚨 {a} ≈ {b} (distance {d})")
+if leaks or dupes:
+    print(f"❌ {len(leaks)} source images and {len(dupes)} hash pairs are shared between splits")
+    if args.fail_on_leak:
+        sys.exit(1)
+else:
+    print("✅ No train/val leakage")
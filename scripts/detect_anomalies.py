@@ -2,66 +2,150 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
+import argparse
 from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import load_model
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.sequences import create_sequences, reconstruction_errors
+from utils.quantile import QuantileSketch
+from utils.inference_backends import load_inference_model
 
-# === Load data ===
-df = pd.read_csv("data/sensors/sensor_data.csv", parse_dates=["timestamp"])
+INPUT_PATH = "data/sensors/sensor_data.csv"
+OUTPUT_PATH = "data/sensors/anomaly_results.csv"
+PARQUET_OUTPUT_PATH = "data/sensors/anomaly_results.parquet"
+MODEL_PATH = "models/lstm_autoencoder.h5"
+SCALER_PATH = "models/lstm_scaler.npy"
 features = ["vibration", "temp", "pressure"]
+window_size = 30
+THRESHOLD_PERCENTILE = 95  # top 5% of errors are considered anomalies
 
-# === Load scaler and scale full data ===
-scaler_max = np.load("models/lstm_scaler.npy")
-scaler = MinMaxScaler()
-scaler.fit(np.zeros((1, len(features))))
-scaler.scale_ = 1.0 / scaler_max
-scaler.min_ = 0
-scaler.data_max_ = scaler_max
-df[features] = scaler.transform(df[features])
-
-# === Create sliding sequences ===
-def create_sequences(data, window_size=30):
-    sequences = []
-    for i in range(len(data) - window_size):
-        seq = data[i:i+window_size]
-        sequences.append(seq)
-    return np.array(sequences)
+# === Load scaler ===
+def load_scaler(path=SCALER_PATH):
+    scaler_max = np.load(path)
+    scaler = MinMaxScaler()
+    scaler.fit(np.zeros((1, len(features))))
+    scaler.scale_ = 1.0 / scaler_max
+    scaler.min_ = 0
+    scaler.data_max_ = scaler_max
+    return scaler
 
-window_size = 30
-X = create_sequences(df[features].values, window_size)
-timestamps = df["timestamp"].values[window_size:]
-true_labels = df["label"].values[window_size:]
-
-# === Load model ===
-model = load_model("models/lstm_autoencoder.h5")
-
-# === Predict and compute reconstruction error ===
-X_pred = model.predict(X)
-mse = np.mean(np.mean(np.square(X - X_pred), axis=2), axis=1)
-
-# === Set dynamic threshold ===
-threshold = np.percentile(mse, 95)  # top 5% of errors are considered anomalies
-pred_labels = ["anomaly" if e > threshold else "normal" for e in mse]
-
-# === Save results ===
-results_df = pd.DataFrame({
-    "timestamp": timestamps,
-    "reconstruction_error": mse,
-    "true_label": true_labels,
-    "predicted_label": pred_labels
-})
-results_df.to_csv("data/sensors/anomaly_results.csv", index=False)
-
-# === Plot ===
-plt.figure(figsize=(12, 5))
-plt.plot(results_df["timestamp"], mse, label="Reconstruction Error", alpha=0.8)
-plt.axhline(y=threshold, color="red", linestyle="--", label=f"Threshold = {threshold:.4f}")
-plt.xticks(rotation=45)
-plt.title("Sensor Anomaly Detection using LSTM Autoencoder")
-plt.ylabel("Reconstruction Error")
-plt.xlabel("Timestamp")
-plt.legend()
-plt.tight_layout()
-plt.savefig("history/anomaly_detection.png")
-plt.show()
-
-print("✅ Anomaly detection complete.")
+# === In-memory scoring ===
+def score(df, model, scaler):
+    values = scaler.transform(df[features])
+
+    # Sliding sequences: window i is reported at row i + window_size
+    X = create_sequences(values, window_size)
+
+    # X is a strided view; windows are only materialized one batch at a time
+    mse = reconstruction_errors(model, X)
+
+    return pd.DataFrame({
+        "timestamp": df["timestamp"].values[window_size:],
+        "reconstruction_error": mse,
+        "true_label": df["label"].values[window_size:],
+    })
+
+def label_results(results_df, threshold):
+    results_df["predicted_label"] = np.where(results_df["reconstruction_error"] > threshold, "anomaly", "normal")
+    return results_df
+
+def detect(df, model, scaler):
+    results_df = score(df, model, scaler)
+
+    # Dynamic threshold
+    threshold = np.percentile(results_df["reconstruction_error"], THRESHOLD_PERCENTILE)
+    return label_results(results_df, threshold), threshold
+
+# === Chunked (out-of-core) scoring ===
+def detect_chunked(input_path, model, scaler, output_path, chunk_size=100_000):
+    # Pass 1 reads the CSV in chunks, carrying the last window_size rows of
+    # each chunk into the next so no window is lost at a boundary, and writes
+    # errors to a temporary Parquet file while a quantile sketch tracks the
+    # threshold. Pass 2 streams that file back and adds predicted labels.
+    # Peak memory depends on chunk_size, not on the input size.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sketch = QuantileSketch()
+    tmp_path = output_path + ".tmp"
+    writer = None
+    carry = np.empty((0, len(features)))
+    rows = 0
+
+    for chunk in pd.read_csv(input_path, chunksize=chunk_size, parse_dates=["timestamp"]):
+        values = np.concatenate([carry, scaler.transform(chunk[features])])
+        X = create_sequences(values, window_size)
+        # Windows here are reported at the last len(X) rows of this chunk
+        reported = chunk.iloc[len(chunk) - len(X):]
+        carry = values[-window_size:]
+        rows += len(chunk)
+        if not len(X):
+            continue
+
+        mse = reconstruction_errors(model, X)
+        sketch.update(mse)
+        table = pa.table({
+            "timestamp": reported["timestamp"].values,
+            "reconstruction_error": mse,
+            "true_label": reported["label"].astype(str).values,
+        })
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, table.schema)
+        writer.write_table(table)
+        print(f"⏳ {rows} rows read, {sketch.count} windows scored")
+
+    if writer is None:
+        print("⚠️ Not enough rows for a single window.")
+        return None
+    writer.close()
+
+    threshold = sketch.percentile(THRESHOLD_PERCENTILE)
+    writer = None
+    for batch in pq.ParquetFile(tmp_path).iter_batches():
+        errors = batch.column("reconstruction_error").to_numpy()
+        pred_labels = pa.array(np.where(errors > threshold, "anomaly", "normal"))
+        table = pa.Table.from_batches([batch]).append_column("predicted_label", pred_labels)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+    writer.close()
+    os.remove(tmp_path)
+    return threshold
+
+def plot_results(results_df, threshold):
+    plt.figure(figsize=(12, 5))
+    plt.plot(results_df["timestamp"], results_df["reconstruction_error"], label="Reconstruction Error", alpha=0.8)
+    plt.axhline(y=threshold, color="red", linestyle="--", label=f"Threshold = {threshold:.4f}")
+    plt.xticks(rotation=45)
+    plt.title("Sensor Anomaly Detection using LSTM Autoencoder")
+    plt.ylabel("Reconstruction Error")
+    plt.xlabel("Timestamp")
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig("history/anomaly_detection.png")
+    plt.show()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM autoencoder anomaly detection over a sensor history.")
+    parser.add_argument("--input", default=INPUT_PATH)
+    parser.add_argument("--chunked", action="store_true", help="Stream the input in chunks and write Parquet (for large histories)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    scaler = load_scaler()
+    model = load_inference_model(MODEL_PATH)
+
+    if args.chunked:
+        output_path = args.output or PARQUET_OUTPUT_PATH
+        threshold = detect_chunked(args.input, model, scaler, output_path, args.chunk_size)
+        if threshold is not None:
+            print(f"📈 Threshold ({THRESHOLD_PERCENTILE}th percentile, streamed): {threshold:.4f}")
+            print(f"📝 Results saved to {output_path}")
+    else:
+        df = pd.read_csv(args.input, parse_dates=["timestamp"])
+        results_df, threshold = detect(df, model, scaler)
+        results_df.to_csv(args.output or OUTPUT_PATH, index=False)
+        plot_results(results_df, threshold)
+
+    print("✅ Anomaly detection complete.")
@@ -1,30 +1,31 @@
+import os
+import sys
 import pickle
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from sklearn.metrics import classification_report, confusion_matrix
 from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dataset_cache import load_split
 
 # === Load the trained model ===
 model = load_model("model/best_model.h5")
 
 # === Load the validation set ===
-val_datagen = ImageDataGenerator(rescale=1./255)
-val_gen = val_datagen.flow_from_directory(
-    "dataset/val",
-    target_size=(224, 224),
+val_gen, val_index, val_classes = load_split(
+    "dataset/val", "dataset_cache/val",
+    image_size=(224, 224),
     batch_size=32,
-    class_mode='binary',
     shuffle=False  # Important to match predictions with labels
 )
 
 # === Confirm label mappings ===
-print("✅ Class indices from val_gen:", val_gen.class_indices)
+print("✅ Class indices from val_gen:", val_index["class_indices"])
 # Output should be: {'Defective': 0, 'Good': 1}
 
 # === Make predictions ===
-y_true = val_gen.classes
+y_true = val_classes
 y_pred_probs = model.predict(val_gen)
 y_pred = (y_pred_probs > 0.5).astype(int).flatten()
 
@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.image_pipeline import list_images, load_image
+from utils.inference_backends import KerasBackend, TFLiteBackend
+from utils.scaling import load_scaler
+from utils.sequences import create_sequences
+
+# === Export the classifiers to TFLite, optionally quantized ===
+# float16 halves the file size; int8 uses post-training quantization
+# calibrated on dataset/val images (classifier) or normal sensor windows
+# (autoencoder). Each export is checked against the Keras model and the
+# comparison is saved as <output>.json.
+
+MODELS = {
+    "image": "models/best_model.h5",
+    "sensor": "models/lstm_autoencoder.h5",
+}
+VAL_DIR = "dataset/val"
+SENSOR_DATA = "data/sensors/sensor_data.csv"
+SCALER_PATH = "models/lstm_scaler.npy"
+window_size = 30
+ANOMALY_THRESHOLD = float(os.getenv("ANOMALY_THRESHOLD", 0.001))
+
+def image_samples(limit, seed=0):
+    # (paths, labels) from dataset/val; labels follow flow_from_directory (Defective=0, Good=1)
+    paths, labels = [], []
+    for label, cls in enumerate(sorted(os.listdir(VAL_DIR))):
+        cls_paths = list_images(os.path.join(VAL_DIR, cls))
+        paths += cls_paths
+        labels += [label] * len(cls_paths)
+    idx = np.random.default_rng(seed).permutation(len(paths))[:limit]
+    return [paths[i] for i in idx], np.array(labels)[idx]
+
+def sensor_samples(limit, normal_only, seed=0):
+    df = pd.read_csv(SENSOR_DATA)
+    if normal_only:
+        df = df[df["label"] == "normal"]
+    X = create_sequences(load_scaler(SCALER_PATH).transform(df[["vibration", "temp", "pressure"]]), window_size)
+    idx = np.sort(np.random.default_rng(seed).permutation(len(X))[:limit])
+    return np.ascontiguousarray(X[idx], dtype=np.float32)
+
+def convert(model, kind, quantize, calib_samples):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if kind == "sensor":
+        # LSTM layers need the TF op fallback and unlowered tensor lists
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        converter._experimental_lower_tensor_list_ops = False
+    if quantize == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        if kind == "image":
+            paths, _ = image_samples(calib_samples)
+            calib = (load_image(p)[np.newaxis].astype(np.float32) for p in paths)
+        else:
+            calib = (w[np.newaxis] for w in sensor_samples(calib_samples, normal_only=True))
+        samples = list(calib)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([s] for s in samples)
+    return converter.convert()
+
+def timed_predict(backend, x, batch_size):
+    t0 = time.perf_counter()
+    y = backend.predict(x, batch_size=batch_size)
+    return y, (time.perf_counter() - t0) / max(len(x), 1)
+
+def compare_image(keras_backend, tflite_backend, eval_samples):
+    paths, labels = image_samples(eval_samples, seed=1)
+    x = np.stack([load_image(p) for p in paths]).astype(np.float32)
+    p_keras, t_keras = timed_predict(keras_backend, x, 32)
+    p_tflite, t_tflite = timed_predict(tflite_backend, x, 32)
+    p_keras, p_tflite = p_keras[:, 0], p_tflite[:, 0]
+    acc_keras = float(np.mean((p_keras > 0.5) == labels))
+    acc_tflite = float(np.mean((p_tflite > 0.5) == labels))
+    return {
+        "samples": len(x),
+        "keras_accuracy": acc_keras,
+        "tflite_accuracy": acc_tflite,
+        "accuracy_delta": acc_tflite - acc_keras,
+        "label_agreement": float(np.mean((p_keras > 0.5) == (p_tflite > 0.5))),
+        "max_abs_prob_diff": float(np.max(np.abs(p_keras - p_tflite))),
+        "keras_ms_per_sample": t_keras * 1000,
+        "tflite_ms_per_sample": t_tflite * 1000,
+    }
+
+def compare_sensor(keras_backend, tflite_backend, eval_samples):
+    X = sensor_samples(eval_samples, normal_only=False, seed=1)
+    r_keras, t_keras = timed_predict(keras_backend, X, 256)
+    r_tflite, t_tflite = timed_predict(tflite_backend, X, 256)
+    e_keras = np.mean((X - r_keras) ** 2, axis=(1, 2))
+    e_tflite = np.mean((X - r_tflite) ** 2, axis=(1, 2))
+    return {
+        "samples": len(X),
+        "mean_rel_error_diff": float(np.mean(np.abs(e_tflite - e_keras) / np.maximum(e_keras, 1e-12))),
+        "max_abs_error_diff": float(np.max(np.abs(e_tflite - e_keras))),
+        "anomaly_flag_agreement": float(np.mean((e_keras > ANOMALY_THRESHOLD) == (e_tflite > ANOMALY_THRESHOLD))),
+        "keras_ms_per_sample": t_keras * 1000,
+        "tflite_ms_per_sample": t_tflite * 1000,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a model to TFLite and compare it with the Keras model.")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("--quantize", choices=["none", "float16", "int8"], default="none")
+    parser.add_argument("--calib-samples", type=int, default=200, help="Samples for int8 calibration")
+    parser.add_argument("--eval-samples", type=int, default=500, help="Samples for the accuracy comparison")
+    parser.add_argument("--output", default=None, help="Default: the .h5 path with a .tflite extension")
+    args = parser.parse_args()
+
+    h5_path = MODELS[args.model]
+    output = args.output or os.path.splitext(h5_path)[0] + ".tflite"
+    keras_backend = KerasBackend(h5_path)
+
+    print(f"📦 Converting {h5_path} (quantize={args.quantize})...")
+    with open(output, "wb") as f:
+        f.write(convert(keras_backend.model, args.model, args.quantize, args.calib_samples))
+
+    tflite_backend = TFLiteBackend(output)
+    compare = compare_image if args.model == "image" else compare_sensor
+    report = {
+        "model": args.model,
+        "source": h5_path,
+        "output": output,
+        "quantize": args.quantize,
+        "h5_bytes": os.path.getsize(h5_path),
+        "tflite_bytes": os.path.getsize(output),
+        "comparison": compare(keras_backend, tflite_backend, args.eval_samples),
+    }
+    with open(output + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(json.dumps(report["comparison"], indent=2))
+    print(f"✅ Saved {output} ({report['tflite_bytes'] / 1e6:.1f} MB) and {output}.json")
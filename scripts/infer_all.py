@@ -1,51 +1,58 @@
 import os
 import sys
+import argparse
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import numpy as np
 import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 from utils.alert_engine import send_alert
+from utils.image_pipeline import list_images, iter_image_batches
+from utils.inference_backends import load_inference_model
 import pandas as pd
 
-model = load_model("models/best_model.h5")
+parser = argparse.ArgumentParser(description="Classify every image in a folder.")
+parser.add_argument("--img-dir", default="test_images")
+parser.add_argument("--batch-size", type=int, default=32, help="Images per forward pass")
+parser.add_argument("--workers", type=int, default=None, help="Decode threads (default: all cores)")
+parser.add_argument("--fast-decode", action="store_true",
+                    help="Decode large JPEGs at reduced size like the API (faster; confidences can differ slightly)")
+args = parser.parse_args()
 
-img_dir = "test_images"
+model = load_inference_model("models/best_model.h5")
+
+img_dir = args.img_dir
 img_size = (224, 224)
 
 print(f"\n🔍 Running inference on all images in: {img_dir}\n")
 
 results = []
 
-for fname in sorted(os.listdir(img_dir)):
-    if not fname.lower().endswith((".png", ".jpg", ".jpeg")):
-        continue
-
-    path = os.path.join(img_dir, fname)
-    img = image.load_img(path, target_size=img_size)
-    x = image.img_to_array(img)
-    x = np.expand_dims(x, axis=0)
-    x = x / 255.0
-
-    pred = model.predict(x, verbose=0)[0][0]
-    label = "Good" if pred > 0.5 else "Defective"
-    confidence = pred if label == "Good" else 1 - pred
-
-    print(f"🖼️ {fname:<20} → {label:<10} ({confidence*100:.2f}% confident)")
-
-    # Collect results for CSV
-    results.append({
-        'filename': fname,
-        'label': label,
-        'confidence': confidence
-    })
-
-    if label == "Defective":
-        send_alert(
-            title="Visual Defect Detected ⚠️",
-            message=f"{fname} classified as DEFECTIVE with {confidence*100:.2f}% confidence."
-        )
+# Images are decoded in parallel and the next batches are prefetched while
+# the current one runs through the model
+for batch_paths, x in iter_image_batches(list_images(img_dir), img_size, args.batch_size, args.workers,
+                                            draft=args.fast_decode):
+    preds = model.predict(x, verbose=0)[:, 0]
+
+    for path, pred in zip(batch_paths, preds):
+        fname = os.path.basename(path)
+        label = "Good" if pred > 0.5 else "Defective"
+        confidence = pred if label == "Good" else 1 - pred
+
+        print(f"🖼️ {fname:<20} → {label:<10} ({confidence*100:.2f}% confident)")
+
+        # Collect results for CSV
+        results.append({
+            'filename': fname,
+            'label': label,
+            'confidence': confidence
+        })
+
+        if label == "Defective":
+            send_alert(
+                title="Visual Defect Detected ⚠️",
+                message=f"{fname} classified as DEFECTIVE with {confidence*100:.2f}% confidence.",
+                dedup_key=("visual", img_dir)
+            )
 
 print("\n✅ All images processed.")
 
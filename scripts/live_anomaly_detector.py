@@ -1,22 +1,23 @@
-import pandas as pd
 import numpy as np
-from tensorflow.keras.models import load_model
 from sklearn.preprocessing import MinMaxScaler
-import time
 import os
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.alert_engine import send_alert
+from utils.sensor_stream import SensorFeedTail
+from utils.sequences import sliding_windows
+from utils.inference_backends import load_inference_model
 
 
 # Paths
 MODEL_PATH = "models/lstm_autoencoder.h5"
 SCALER_PATH = "models/lstm_scaler.npy"
 LIVE_FEED_PATH = "data/sensors/live_sensor_feed.csv"
+POLL_INTERVAL = 0.5  # Seconds to wait when no new rows have arrived
 
 # Load model & scaler
-model = load_model(MODEL_PATH)
+model = load_inference_model(MODEL_PATH)
 scaler_max = np.load(SCALER_PATH)
 
 # Setup scaler
@@ -26,37 +27,46 @@ scaler.scale_ = 1.0 / scaler_max
 scaler.min_ = 0
 scaler.data_max_ = scaler_max
 
-# Helper to make sliding windows
-def create_sequence(data, window_size=30):
+# Helper to make every window that ends in the new rows
+def create_new_sequences(tail, new_rows, window_size=30):
+    data = np.concatenate([tail, new_rows])
     if len(data) < window_size:
-        return None
-    return np.expand_dims(data[-window_size:], axis=0)
+        return None, data
+    windows = sliding_windows(data, window_size)
+    # Carry the last window_size-1 rows over to the next poll
+    return windows, data[len(data) - window_size + 1:]
 
 # Run
 print("📡 Monitoring live sensor feed... (press Ctrl+C to stop)")
 window_size = 30
-prev_row_count = 0
+threshold = 0.001  # Set dynamically if needed
+feed = SensorFeedTail(LIVE_FEED_PATH)
+tail_scaled = np.empty((0, 3))
+rows_seen = 0  # Cursor: rows consumed from the feed so far
+windows_scored = 0
 
 try:
-    while True:
-        if os.path.exists(LIVE_FEED_PATH):
-            df = pd.read_csv(LIVE_FEED_PATH)
-            if len(df) != prev_row_count:
-                prev_row_count = len(df)
-                values = df[["vibration", "temp", "pressure"]].values
-                values_scaled = scaler.transform(values)
-
-                seq = create_sequence(values_scaled, window_size)
-                if seq is not None:
-                    recon = model.predict(seq, verbose=0)
-                    error = np.mean((seq - recon) ** 2)
-
-                    threshold = 0.001  # Set dynamically if needed
-                    if error > threshold:
-                        timestamp = df.iloc[-1]["timestamp"]
-                        print(f"🚨 [{timestamp}] Anomaly detected! Reconstruction error = {error:.4f}")
-                        send_alert("Sensor Anomaly Detected 🚨", f"At {timestamp} | Reconstruction Error: {error:.4f}")
-        time.sleep(2)
+    # Each poll scores every window completed since the previous one, in one batch
+    for timestamps, values in feed.follow(poll_interval=POLL_INTERVAL):
+        rows_seen += len(values)
+        seqs, tail_scaled = create_new_sequences(tail_scaled, scaler.transform(values), window_size)
+        if seqs is None:
+            continue
+
+        recon = model.predict(seqs, verbose=0)
+        errors = np.mean((seqs - recon) ** 2, axis=(1, 2))
+        windows_scored += len(errors)
+
+        # Window i ends at row len(values) - len(errors) + i of this batch
+        offset = len(values) - len(errors)
+        for i in np.flatnonzero(errors > threshold):
+            timestamp = timestamps[offset + i]
+            error = errors[i]
+            print(f"🚨 [{timestamp}] Anomaly detected! Reconstruction error = {error:.4f}")
+            send_alert("Sensor Anomaly Detected 🚨", f"At {timestamp} | Reconstruction Error: {error:.4f}",
+                       dedup_key=("sensor", LIVE_FEED_PATH))
 
 except KeyboardInterrupt:
-    print("\n🛑 Monitoring stopped.")
+    print(f"\n🛑 Monitoring stopped. {windows_scored} windows scored over {rows_seen} rows.")
+finally:
+    feed.close()
@@ -1,67 +1,191 @@
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
 import os
+import sys
+import time
+import argparse
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.inference_backends import load_inference_model
+from utils.latest_frame import LatestFrame
+from utils.image_pipeline import frames_to_batch
+
+parser = argparse.ArgumentParser(description="Classify the centre ROI of a live camera or video file.")
+parser.add_argument("--source", default="1", help="Camera index (1 = external camera) or video file path")
+parser.add_argument("--pipelined", action="store_true", help="Run capture, inference and display on separate threads")
+parser.add_argument("--every", type=int, default=1, help="Pipelined: classify only every Nth captured frame")
+parser.add_argument("--diff-threshold", type=float, default=0.0,
+                    help="Pipelined: skip frames whose ROI mean abs pixel change since the last classified ROI is below this (0-255)")
+parser.add_argument("--headless", action="store_true", help="No windows; print throughput stats instead (for CI benchmarks)")
+parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many captured frames (0 = no limit)")
+args = parser.parse_args()
+if args.every < 1:
+    parser.error("--every must be at least 1")
 
 # Load your trained model
-model = load_model("models/best_model.h5")
+model = load_inference_model("models/best_model.h5")
 img_size = (224, 224)
+# Model input buffer for the single ROI, reused every frame
+x_buffer = np.empty((1, img_size[1], img_size[0], 3), dtype=np.float32)
 
-# Open webcam (1 = external camera)
-cap = cv2.VideoCapture(1)
-
-print("Press 'q' to quit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("Failed to grab frame.")
-        break
+def open_source(source):
+    return cv2.VideoCapture(int(source) if source.isdigit() else source)
 
-    h, w, _ = frame.shape
+def roi_box(frame):
     # Calculate center rectangle coordinates
+    h, w, _ = frame.shape
     rect_w, rect_h = img_size
     x1 = w // 2 - rect_w // 2
     y1 = h // 2 - rect_h // 2
-    x2 = x1 + rect_w
-    y2 = y1 + rect_h
+    return x1, y1, x1 + rect_w, y1 + rect_h
+
+def crop_roi(frame):
+    # Crop the region inside the rectangle for inference; None if the frame is too small
+    x1, y1, x2, y2 = roi_box(frame)
+    roi = frame[max(y1, 0):y2, max(x1, 0):x2]
+    if roi.shape[0] != img_size[1] or roi.shape[1] != img_size[0]:
+        return None
+    return roi
+
+def classify(roi):
+    # Preprocess ROI for model (BGR -> RGB, rescaled into the reused buffer)
+    x = frames_to_batch([roi], out=x_buffer)
+
+    # Inference
+    pred = model.predict(x, verbose=0)[0][0]
+    label = "Good" if pred > 0.5 else "Defective"
+    confidence = pred if label == "Good" else 1 - pred
+    return pred, label, confidence
 
+def draw(frame, result):
+    x1, y1, x2, y2 = roi_box(frame)
     # Draw rectangle (focus area)
     cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
+    if result is not None:
+        # Display result on frame (above rectangle)
+        _, label, confidence = result
+        text = f"{label} ({confidence*100:.2f}%)"
+        color = (0, 255, 0) if label == "Good" else (0, 0, 255)
+        cv2.putText(frame, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+    return frame
 
-    # Crop the region inside the rectangle for inference
-    roi = frame[y1:y2, x1:x2]
-    if roi.shape[0] != rect_h or roi.shape[1] != rect_w:
-        cv2.imshow("Live Camera Inference", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+# === Sequential mode: capture, infer and display in one loop ===
+def run_sequential(cap):
+    frames = 0
+    start = time.perf_counter()
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("Failed to grab frame.")
             break
-        continue
+        frames += 1
 
-    # Show the ROI for debugging
-    cv2.imshow("ROI", roi)
+        roi = crop_roi(frame)
+        result = None
+        if roi is not None:
+            if not args.headless:
+                # Show the ROI for debugging
+                cv2.imshow("ROI", roi)
+            result = classify(roi)
+            if not args.headless:
+                print("Raw model output:", result[0])  # Debug: print raw output
 
-    # Preprocess ROI for model
-    x = image.img_to_array(roi)
-    x = np.expand_dims(x, axis=0)
-    x = x / 255.0
+        if not args.headless:
+            cv2.imshow("Live Camera Inference", draw(frame, result))
+            # Press 'q' to quit
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+        if args.max_frames and frames >= args.max_frames:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"📊 {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-9):.1f} FPS), all classified")
 
-    # Inference
-    pred = model.predict(x, verbose=0)[0][0]
-    print("Raw model output:", pred)  # Debug: print raw output
-    label = "Good" if pred > 0.5 else "Defective"
-    confidence = pred if label == "Good" else 1 - pred
+# === Pipelined mode: capture thread -> inference worker -> display ===
+def run_pipelined(cap):
+    latest = LatestFrame()
+    result_lock = threading.Lock()
+    state = {"result": None, "captured": 0, "classified": 0, "skipped": 0}
+    stop = threading.Event()
+
+    def capture_loop():
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                print("Failed to grab frame.")
+                break
+            state["captured"] += 1
+            latest.put(frame)
+            if args.max_frames and state["captured"] >= args.max_frames:
+                break
+        latest.close()
+
+    def inference_loop():
+        last_id, last_roi = 0, None
+        while not stop.is_set():
+            frame_id, frame = latest.get_newer(last_id)
+            if frame_id == last_id:
+                if latest.closed:
+                    break
+                continue
+            last_id = frame_id
+            if frame_id % args.every:
+                state["skipped"] += 1
+                continue
+            roi = crop_roi(frame)
+            if roi is None:
+                continue
+            # Skip near-identical ROIs; the previous result still applies
+            if args.diff_threshold > 0 and last_roi is not None and \
+                    np.mean(cv2.absdiff(roi, last_roi)) < args.diff_threshold:
+                state["skipped"] += 1
+                continue
+            last_roi = roi.copy()
+            result = classify(roi)
+            with result_lock:
+                state["result"] = result
+            state["classified"] += 1
+
+    threads = [threading.Thread(target=capture_loop, daemon=True), threading.Thread(target=inference_loop, daemon=True)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    # Display runs on the main thread (OpenCV GUI calls must)
+    last_shown = 0
+    while threads[1].is_alive():
+        if args.headless:
+            threads[1].join(0.5)
+            continue
+        frame_id, frame = latest.get_newer(last_shown, timeout=0.05)
+        if frame_id == last_shown:
+            continue
+        last_shown = frame_id
+        with result_lock:
+            result = state["result"]
+        cv2.imshow("Live Camera Inference", draw(frame.copy(), result))
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
 
-    # Display result on frame (above rectangle)
-    text = f"{label} ({confidence*100:.2f}%)"
-    color = (0, 255, 0) if label == "Good" else (0, 0, 255)
-    cv2.putText(frame, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+    stop.set()
+    latest.close()
+    for t in threads:
+        t.join(timeout=2)
+    elapsed = time.perf_counter() - start
+    captured, classified, skipped = state["captured"], state["classified"], state["skipped"]
+    print(f"📊 {captured} frames in {elapsed:.1f}s ({captured / max(elapsed, 1e-9):.1f} FPS captured, "
+          f"{classified / max(elapsed, 1e-9):.1f} FPS classified), {skipped} skipped, "
+          f"{max(captured - classified - skipped, 0)} dropped as stale")
 
-    cv2.imshow("Live Camera Inference", frame)
+# Open webcam or video file
+cap = open_source(args.source)
+if not args.headless:
+    print("Press 'q' to quit.")
 
-    # Press 'q' to quit
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+if args.pipelined:
+    run_pipelined(cap)
+else:
+    run_sequential(cap)
 
 cap.release()
-cv2.destroyAllWindows() 
\ No newline at end of file
+if not args.headless:
+    cv2.destroyAllWindows()
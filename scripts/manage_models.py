@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils import model_registry
+
+# Manage the versioned model registry the backend watches (MODEL_REGISTRY).
+# Typical rollout: train (registers a new version as "candidate"), run the
+# backend with CANDIDATE_FRACTION set to compare it in shadow or canary mode
+# on /metrics and /models, then promote it to "production".
+
+parser = argparse.ArgumentParser(description="Register, list, verify and promote model versions.")
+parser.add_argument("--registry", default="models/registry")
+parser.add_argument("--name", default="image", help="Model name in the registry")
+sub = parser.add_subparsers(dest="command", required=True)
+reg = sub.add_parser("register", help="Copy a model file (and its .tflite export) in as a new version")
+reg.add_argument("model")
+reg.add_argument("--metrics", default=None, help="JSON object of validation metrics, e.g. '{\"val_accuracy\": 0.98}'")
+reg.add_argument("--alias", default=None, help="Point this alias (e.g. candidate) at the new version")
+sub.add_parser("list", help="Versions with their aliases and metrics")
+promote = sub.add_parser("promote", help="Point an alias at a version")
+promote.add_argument("version")
+promote.add_argument("--alias", default="production")
+unset = sub.add_parser("unset", help="Remove an alias (e.g. stop scoring the candidate)")
+unset.add_argument("alias")
+verify = sub.add_parser("verify", help="Check a version's files against their checksums")
+verify.add_argument("version")
+args = parser.parse_args()
+
+if args.command == "register":
+    metrics = json.loads(args.metrics) if args.metrics else None
+    version = model_registry.register(args.registry, args.name, args.model, metrics=metrics, alias=args.alias)
+    print(f"✅ Registered {args.model} as {args.name} {version}" + (f" ({args.alias})" if args.alias else ""))
+
+elif args.command == "list":
+    aliases = model_registry.read_aliases(args.registry, args.name)
+    by_version = {}
+    for alias, version in aliases.items():
+        by_version.setdefault(version, []).append(alias)
+    for version in model_registry.versions(args.registry, args.name):
+        meta = model_registry.read_metadata(args.registry, args.name, version)
+        tags = ",".join(sorted(by_version.get(version, [])))
+        metrics = ", ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in meta["metrics"].items())
+        print(f"{version}  {meta['created']}  {tags:<20} {metrics}")
+
+elif args.command == "promote":
+    if model_registry.verify(args.registry, args.name, args.version):
+        sys.exit(f"❌ {args.name} {args.version} failed checksum verification, not promoted")
+    aliases = model_registry.set_alias(args.registry, args.name, args.alias, args.version)
+    if args.alias == "production" and aliases.get("candidate") == args.version:
+        aliases = model_registry.set_alias(args.registry, args.name, "candidate", None)
+    print(f"✅ {args.name} aliases: {aliases}")
+
+elif args.command == "unset":
+    print(f"✅ {args.name} aliases: {model_registry.set_alias(args.registry, args.name, args.alias, None)}")
+
+elif args.command == "verify":
+    bad = model_registry.verify(args.registry, args.name, args.version)
+    if bad:
+        sys.exit(f"❌ {args.name} {args.version}: checksum mismatch in {', '.join(bad)}")
+    print(f"✅ {args.name} {args.version}: all files match their checksums")
@@ -0,0 +1,160 @@
+import cv2
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.inference_backends import load_inference_model
+from utils.latest_frame import LatestFrame
+from utils.image_pipeline import frames_to_batch
+
+# === Multi-camera inference ===
+# One reader thread per source keeps only that source's newest frame. A
+# single inference loop crops the configured ROIs from every stream that has
+# a new frame and classifies all of them in one forward pass, so N cameras
+# share one model and one process.
+#
+# ROI config (--config) is JSON: {"<source>": [[x, y, w, h], ...], ...}.
+# Sources without an entry use the 224x224 centre box. ROIs that are not
+# 224x224 are resized.
+
+img_size = (224, 224)
+
+parser = argparse.ArgumentParser(description="Batched ROI classification across several cameras/streams.")
+parser.add_argument("sources", nargs="+", help="Camera indexes, RTSP URLs or video files")
+parser.add_argument("--config", default=None, help="JSON file with per-source ROIs")
+parser.add_argument("--max-batch", type=int, default=64, help="Max ROIs per forward pass")
+parser.add_argument("--realtime", action="store_true", help="Pace video files at their native FPS")
+parser.add_argument("--status-every", type=float, default=5.0, help="Seconds between per-stream status lines")
+parser.add_argument("--results", default=None, help="Append every result as a JSON line to this file")
+parser.add_argument("--duration", type=float, default=0, help="Stop after this many seconds (0 = until all sources end)")
+args = parser.parse_args()
+
+model = load_inference_model("models/best_model.h5")
+
+def centre_roi(frame):
+    h, w, _ = frame.shape
+    return [w // 2 - img_size[0] // 2, h // 2 - img_size[1] // 2, img_size[0], img_size[1]]
+
+def crop(frame, roi):
+    x, y, w, h = roi
+    patch = frame[max(y, 0):y + h, max(x, 0):x + w]
+    if patch.shape[0] == 0 or patch.shape[1] == 0:
+        return None
+    if patch.shape[:2] != (img_size[1], img_size[0]):
+        patch = cv2.resize(patch, img_size)
+    return patch
+
+class Stream:
+    def __init__(self, source, rois):
+        self.source = source
+        self.rois = rois
+        self.latest = LatestFrame()
+        self.cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+        self.last_id = 0
+        self.captured = 0
+        self.classified = 0
+        self.results = []
+        self.thread = threading.Thread(target=self._read, name=f"read-{source}", daemon=True)
+
+    def _read(self):
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 0
+        delay = 1.0 / fps if args.realtime and fps > 0 else 0
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.captured += 1
+            self.latest.put(frame)
+            if delay:
+                time.sleep(delay)
+        self.latest.close()
+        self.cap.release()
+
+    def take_new(self):
+        # The newest frame if it has not been classified yet, else None
+        with self.latest.cond:
+            frame_id, frame = self.latest.frame_id, self.latest.frame
+        if frame_id == self.last_id:
+            return None
+        self.last_id = frame_id
+        return frame
+
+    @property
+    def done(self):
+        return self.latest.closed and self.latest.frame_id == self.last_id
+
+def load_rois(path):
+    if path is None:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def run(streams):
+    results_file = open(args.results, "a") if args.results else None
+    start = last_status = time.perf_counter()
+    batches = rois_total = 0
+    try:
+        while not all(s.done for s in streams):
+            if args.duration and time.perf_counter() - start > args.duration:
+                break
+            # Gather ROIs from every stream that has a new frame
+            patches, owners = [], []
+            for stream in streams:
+                frame = stream.take_new()
+                if frame is None:
+                    continue
+                for i, roi in enumerate(stream.rois or [centre_roi(frame)]):
+                    patch = crop(frame, roi)
+                    if patch is not None:
+                        patches.append(patch)
+                        owners.append((stream, i))
+            if not patches:
+                time.sleep(0.002)
+                continue
+
+            # One forward pass for all streams
+            x = frames_to_batch(patches)
+            preds = model.predict(x, batch_size=args.max_batch, verbose=0)[:, 0]
+            batches += 1
+            rois_total += len(preds)
+
+            now = time.time()
+            per_stream = {}
+            for (stream, roi_idx), pred in zip(owners, preds):
+                label = "Good" if pred > 0.5 else "Defective"
+                confidence = float(pred if label == "Good" else 1 - pred)
+                per_stream.setdefault(stream, []).append({"roi": roi_idx, "label": label, "confidence": confidence})
+            for stream, roi_results in per_stream.items():
+                stream.classified += 1
+                stream.results = roi_results
+                if results_file:
+                    results_file.write(json.dumps({"time": now, "source": stream.source, "results": roi_results}) + "\n")
+
+            if time.perf_counter() - last_status >= args.status_every:
+                last_status = time.perf_counter()
+                print_status(streams, start, batches, rois_total)
+    finally:
+        if results_file:
+            results_file.close()
+    print_status(streams, start, batches, rois_total)
+
+def print_status(streams, start, batches, rois_total):
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    for s in streams:
+        latest = ", ".join(f"{r['label']} ({r['confidence']*100:.1f}%)" for r in s.results) or "-"
+        print(f"📹 {s.source:<24} captured {s.captured / elapsed:5.1f} FPS | classified {s.classified / elapsed:5.1f} FPS | {latest}")
+    print(f"📊 {rois_total / elapsed:.1f} ROIs/s over {batches} batches (avg {rois_total / max(batches, 1):.1f} ROIs/batch)")
+
+rois_config = load_rois(args.config)
+streams = [Stream(src, rois_config.get(src)) for src in args.sources]
+for s in streams:
+    s.thread.start()
+print(f"📡 Classifying {len(streams)} streams... (Ctrl+C to stop)")
+try:
+    run(streams)
+except KeyboardInterrupt:
+    print("\n🛑 Stopped.")
@@ -0,0 +1,119 @@
+import os
+import sys
+import glob
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Nightly reprocessing: shards sensor files or image folders across a process
+# pool. Each worker loads its model once (pool initializer) and is pinned to a
+# few TF threads so workers don't oversubscribe the cores.
+
+SENSOR_MODEL_PATH = "models/lstm_autoencoder.h5"
+IMG_MODEL_PATH = "models/best_model.h5"
+SENSOR_OUTPUT = "data/sensors/anomaly_results.csv"
+IMAGE_OUTPUT = "logs/image_inference_results.csv"
+img_size = (224, 224)
+
+# Per-process state, set by init_worker
+_model = None
+_scaler = None
+
+def init_worker(model_path, threads_per_worker, with_scaler):
+    global _model, _scaler
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    from utils.inference_backends import load_inference_model
+    _model = load_inference_model(model_path)
+    if with_scaler:
+        from detect_anomalies import load_scaler
+        _scaler = load_scaler()
+
+# === Sensor shards: one CSV per task ===
+def score_sensor_file(path):
+    from detect_anomalies import score
+    df = pd.read_csv(path, parse_dates=["timestamp"])
+    results_df = score(df, _model, _scaler)
+    results_df["source"] = os.path.basename(path)
+    return results_df
+
+# === Image shards: a list of files per task ===
+def score_image_shard(paths, batch_size=32):
+    from utils.image_pipeline import iter_image_batches
+    rows = []
+    for batch_paths, x in iter_image_batches(paths, img_size, batch_size, workers=2):
+        preds = _model.predict(x, verbose=0)[:, 0]
+        for path, pred in zip(batch_paths, preds):
+            label = "Good" if pred > 0.5 else "Defective"
+            confidence = pred if label == "Good" else 1 - pred
+            rows.append({"filename": os.path.basename(path), "label": label, "confidence": confidence, "source": os.path.dirname(path)})
+    return pd.DataFrame(rows, columns=["filename", "label", "confidence", "source"])
+
+def make_pool(workers, model_path, threads_per_worker, with_scaler=False):
+    # spawn: TensorFlow is not fork-safe once initialized
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(model_path, threads_per_worker, with_scaler),
+    )
+
+def run_sensors(files, workers, threads_per_worker, keep_source):
+    from detect_anomalies import label_results, THRESHOLD_PERCENTILE
+    with make_pool(workers, SENSOR_MODEL_PATH, threads_per_worker, with_scaler=True) as pool:
+        shards = list(pool.map(score_sensor_file, files))
+    if not shards:
+        results_df = pd.DataFrame(columns=["timestamp", "reconstruction_error", "true_label", "predicted_label", "source"])
+        return results_df if keep_source else results_df.drop(columns="source")
+    results_df = pd.concat(shards, ignore_index=True)
+    # One threshold over every shard, same rule as detect_anomalies.py
+    threshold = np.percentile(results_df["reconstruction_error"], THRESHOLD_PERCENTILE)
+    results_df = label_results(results_df, threshold)
+    if not keep_source:
+        results_df = results_df.drop(columns="source")
+    print(f"📈 Threshold: {threshold:.4f}")
+    return results_df
+
+def run_images(folders, workers, threads_per_worker, shard_size, keep_source):
+    from utils.image_pipeline import list_images
+    paths = [p for folder in folders for p in list_images(folder)]
+    shards = [paths[i:i + shard_size] for i in range(0, len(paths), shard_size)]
+    with make_pool(workers, IMG_MODEL_PATH, threads_per_worker) as pool:
+        results = list(pool.map(score_image_shard, shards))
+    results_df = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=["filename", "label", "confidence", "source"])
+    if not keep_source:
+        results_df = results_df.drop(columns="source")
+    print(f"🚨 {int((results_df['label'] == 'Defective').sum())} defective of {len(results_df)} images")
+    return results_df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel batch scoring of sensor files or image folders.")
+    parser.add_argument("kind", choices=["sensors", "images"])
+    parser.add_argument("inputs", nargs="+", help="Sensor CSV files/globs, or image folders")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--shard-size", type=int, default=256, help="Images per task")
+    parser.add_argument("--keep-source", action="store_true", help="Add a source column naming the input file/folder")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.kind == "sensors":
+        files = sorted(f for pattern in args.inputs for f in glob.glob(pattern))
+        print(f"🔍 Scoring {len(files)} sensor files on {args.workers} workers")
+        results_df = run_sensors(files, args.workers, args.threads_per_worker, args.keep_source)
+        output = args.output or SENSOR_OUTPUT
+    else:
+        print(f"🔍 Scoring {len(args.inputs)} image folders on {args.workers} workers")
+        results_df = run_images(args.inputs, args.workers, args.threads_per_worker, args.shard_size, args.keep_source)
+        output = args.output or IMAGE_OUTPUT
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    results_df.to_csv(output, index=False)
+    print(f"\n📝 {len(results_df)} results saved to {output} in {time.time() - start:.1f}s")
@@ -1,10 +1,13 @@
 import os
+import sys
 import pickle
 import numpy as np
 from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, CSVLogger
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dataset_cache import load_split
+from utils.model_registry import register
 
 # === CONFIG ===
 BATCH_SIZE = 32
@@ -12,8 +15,10 @@ IMAGE_SIZE = (224, 224)
 EPOCHS = 30
 START_EPOCH = 10
 DATASET_DIR = "D:/Smart_factory_ai/dataset"
+CACHE_DIR = DATASET_DIR + "_cache"
 MODEL_PATH = "best_model.h5"
 HISTORY_PATH = "history_finetune.pkl"
+REGISTRY_DIR = "models/registry"  # The fine-tuned model is registered here as the "candidate" version
 
 # === Load Model and Unfreeze Base ===
 model = load_model(MODEL_PATH)
@@ -22,25 +27,18 @@ model.trainable = True  # Unfreeze entire model
 model.compile(optimizer=Adam(1e-5), loss='binary_crossentropy', metrics=['accuracy'])
 
 # === Data Loaders ===
-train_datagen = ImageDataGenerator(rescale=1./255)
-val_datagen = ImageDataGenerator(rescale=1./255)
-
-train_gen = train_datagen.flow_from_directory(
-    os.path.join(DATASET_DIR, "train"),
-    target_size=IMAGE_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode="binary"
+train_gen, _, train_classes = load_split(
+    os.path.join(DATASET_DIR, "train"), os.path.join(CACHE_DIR, "train"),
+    image_size=IMAGE_SIZE, batch_size=BATCH_SIZE, shuffle=True
 )
-val_gen = val_datagen.flow_from_directory(
-    os.path.join(DATASET_DIR, "val"),
-    target_size=IMAGE_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode="binary"
+val_gen, _, _ = load_split(
+    os.path.join(DATASET_DIR, "val"), os.path.join(CACHE_DIR, "val"),
+    image_size=IMAGE_SIZE, batch_size=BATCH_SIZE
 )
 
 # === Class Weights ===
 from sklearn.utils.class_weight import compute_class_weight
-classes = train_gen.classes
+classes = train_classes
 class_weights = compute_class_weight('balanced', classes=np.unique(classes), y=classes)
 class_weights = dict(enumerate(class_weights))
 print("Class weights:", class_weights)
@@ -65,3 +63,11 @@ with open(HISTORY_PATH, 'wb') as f:
     pickle.dump(history.history, f)
 
 print("✅ Fine-tuning resumed and completed. Model saved.")
+
+# === Register the Result ===
+best = int(np.argmax(history.history["val_accuracy"]))
+version = register(REGISTRY_DIR, "image", MODEL_PATH, alias="candidate",
+                   metrics={"val_accuracy": float(history.history["val_accuracy"][best]),
+                            "val_loss": float(history.history["val_loss"][best]), "best_epoch": START_EPOCH + best + 1},
+                   source={"script": "resume_finetune.py", "dataset": DATASET_DIR, "base_model": MODEL_PATH})
+print(f"📦 Registered as image {version} (candidate) in {REGISTRY_DIR}")
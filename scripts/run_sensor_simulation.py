@@ -2,12 +2,16 @@ import pandas as pd
 import numpy as np
 import time
 import os
+import sys
 import threading
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import load_model
 from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.sensor_stream import SensorFeedWriter, SensorFeedTail
+from utils.sequences import create_sequences, reconstruction_errors
+from utils.inference_backends import load_inference_model
 
 # === Paths ===
 SOURCE_FILE = "data/sensors/sensor_data.csv"
@@ -16,7 +20,7 @@ MODEL_PATH = "models/lstm_autoencoder.h5"
 SCALER_PATH = "models/lstm_scaler.npy"
 
 # === Load model and scaler ===
-model = load_model(MODEL_PATH)
+model = load_inference_model(MODEL_PATH)
 scaler_max = np.load(SCALER_PATH)
 scaler = MinMaxScaler()
 scaler.fit(np.zeros((1, 3)))
@@ -29,50 +33,50 @@ recon_errors = []
 timestamps = []
 threshold = None
 window_size = 30
+feed_tail = SensorFeedTail(LIVE_FEED_FILE)
+live_values = np.empty((0, 3))
+last_timestamp = None
 
 # === Thread: Stream Data ===
 def stream_sensor_data():
     df = pd.read_csv(SOURCE_FILE)
-    os.makedirs(os.path.dirname(LIVE_FEED_FILE), exist_ok=True)
-    with open(LIVE_FEED_FILE, "w") as f:
-        f.write("timestamp,vibration,temp,pressure,label\n")
-
-    for i, row in df.iterrows():
-        with open(LIVE_FEED_FILE, "a") as f:
-            f.write(",".join(map(str, row.values)) + "\n")
-        time.sleep(0.25)  # Simulate 4 Hz stream
+    with SensorFeedWriter(LIVE_FEED_FILE) as feed:
+        for row in df.itertuples(index=False):
+            feed.write(row)
+            time.sleep(0.25)  # Simulate 4 Hz stream
 
 # === Thread: Live Plot + Anomaly Detection ===
 def update_plot(frame):
-    global recon_errors, timestamps, threshold
+    global recon_errors, timestamps, threshold, live_values, last_timestamp
 
     try:
-        df_live = pd.read_csv(LIVE_FEED_FILE, parse_dates=["timestamp"])
-        if len(df_live) < window_size:
+        # Only parse rows appended since the last frame
+        new_timestamps, new_values = feed_tail.read_new()
+        if len(new_values):
+            live_values = np.concatenate([live_values, new_values])
+            last_timestamp = pd.to_datetime(new_timestamps[-1])
+        if len(live_values) < window_size:
             return
 
         # Take last window
-        recent_data = df_live.iloc[-window_size:][["vibration", "temp", "pressure"]]
-        recent_scaled = scaler.transform(recent_data)
+        recent_scaled = scaler.transform(live_values[-window_size:])
         seq = recent_scaled[np.newaxis, :, :]
 
         # Predict
         recon = model.predict(seq, verbose=0)
         error = np.mean(np.square(recent_scaled - recon))
-        timestamp = df_live.iloc[-1]["timestamp"]
+        timestamp = last_timestamp
 
         if threshold is None:
             # Estimate threshold dynamically after enough data
-            history_data = df_live[["vibration", "temp", "pressure"]].values
-            sequences = []
-            for i in range(len(history_data) - window_size):
-                sequences.append(scaler.transform(history_data[i:i+window_size]))
-            sequences = np.array(sequences)
-            preds = model.predict(sequences, verbose=0)
-            mse = np.mean(np.mean(np.square(sequences - preds), axis=2), axis=1)
+            sequences = create_sequences(scaler.transform(live_values), window_size)
+            mse = reconstruction_errors(model, sequences)
             threshold = np.percentile(mse, 95)
             print(f"📈 Dynamic Threshold: {threshold:.4f}")
 
+        # Past the threshold estimate only the latest window is needed
+        live_values = live_values[-window_size:]
+
         # Store
         recon_errors.append(error)
         timestamps.append(timestamp)
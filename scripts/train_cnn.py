@@ -1,13 +1,20 @@
 import os
+import sys
+import argparse
 import numpy as np
 import pickle
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.applications import MobileNetV2
-from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout, Input
-from tensorflow.keras.models import Model, load_model
-from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, CSVLogger, Callback
+from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, CSVLogger
 from tensorflow.keras.optimizers import Adam
 from sklearn.utils.class_weight import compute_class_weight
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.architectures import build_image_classifier
+from utils.dataset_cache import load_split, cached_dataset, CachedImages
+from utils.augmentation import augment_dataset
+from utils.dataset_index import build_index, connect, leaked_sources
+from utils.model_registry import register
+from utils.distributed_training import (STRATEGIES, set_precision, make_strategy, is_chief, worker_path,
+                                        distribute_sharded, with_class_weights, GradientAccumulationModel,
+                                        ThroughputCallback, export_float32)
 
 # ========================
 # 🔧 Configurations
@@ -17,84 +24,179 @@ IMAGE_SIZE = (224, 224)
 EPOCHS = 30
 FINE_TUNE_AT = 10  # Unfreeze from this epoch
 DATASET_DIR = "D:/Smart_factory_ai/dataset"  # or "/content/dataset" on Colab
+AUGMENT = True  # Fresh rotation/zoom/shift/shear/brightness/flip per epoch, same ranges as augment_mvtec_all.py
+SEED = None  # Set for reproducible shuffling and augmentation (benchmarks)
+CHECK_LEAKAGE = True  # Refuse to train if one source image has copies in both train and val
 MODEL_PATH = "best_model.h5"
 HISTORY_PATH = "history.pkl"
+REGISTRY_DIR = "models/registry"  # The best model is registered here as the "candidate" version
+
+# Defaults reproduce the original single-process float32 run. For several
+# worker processes on one node, use scripts/train_distributed.py, which
+# prepares the data once and starts this script with --strategy multiworker.
+parser = argparse.ArgumentParser(description="Train the MobileNetV2 defect classifier.")
+parser.add_argument("--dataset-dir", default=DATASET_DIR)
+parser.add_argument("--strategy", choices=STRATEGIES, default="none")
+parser.add_argument("--mixed-precision", action="store_true", help="mixed_bfloat16 policy (fastest on CPUs with AVX512_BF16/AMX)")
+parser.add_argument("--accum-steps", type=int, default=1,
+                    help="Micro-batches of --batch-size per optimizer step (effective batch = batch x steps x replicas)")
+parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Per-replica micro-batch size")
+parser.add_argument("--epochs", type=int, default=EPOCHS)
+parser.add_argument("--fine-tune-at", type=int, default=FINE_TUNE_AT)
+parser.add_argument("--registry", default=REGISTRY_DIR, help="Model registry to add the result to ('' to skip)")
+parser.add_argument("--seed", type=int, default=SEED,
+                    help="Shuffle/augmentation seed (train_distributed.py passes one to every worker)")
+parser.add_argument("--steps-per-epoch", type=int, default=None, help="Limit steps per epoch (smoke tests)")
+args = parser.parse_args()
+
+# Has to exist before any other TensorFlow op in multi-worker mode
+strategy = make_strategy(args.strategy)
+multiworker = args.strategy == "multiworker"
+set_precision(args.mixed_precision)
+# Anything beyond the original setup checkpoints weights and exports a plain float32 .h5 at the end
+plain_run = args.strategy == "none" and not args.mixed_precision and args.accum_steps == 1
+replicas = strategy.num_replicas_in_sync
+global_batch = args.batch_size * args.accum_steps * replicas
+cache_dir = args.dataset_dir.rstrip("/\\") + "_cache"  # Resized uint8 shards, rebuilt when images change
+
+# ========================
+# 🔍 Leakage Check
+# ========================
+# In multi-worker mode train_distributed.py runs this once before starting the workers
+if CHECK_LEAKAGE and not multiworker:
+    build_index(args.dataset_dir)
+    conn = connect(args.dataset_dir)
+    leaks = leaked_sources(conn)
+    conn.close()
+    if leaks:
+        sys.exit(f"❌ {len(leaks)} source images are in both train and val (e.g. {leaks[0][0]}); "
+                 "rebuild the split or run scripts/check_dataset.py for details")
 
 # ========================
 # 📁 Data Loaders
 # ========================
-train_datagen = ImageDataGenerator(rescale=1./255)
-val_datagen = ImageDataGenerator(rescale=1./255)
+# Images are decoded and resized once into the cache, then read back
+# through tf.data with parallel reads, shuffling and prefetching.
+# Worker processes only read the cache; train_distributed.py builds it,
+# and each worker reads, decodes and augments only its own shard of it.
+def worker_dataset(split, shuffle=False, class_weights=None):
+    def make_dataset(num_shards, shard_index, batch_size):
+        ds, _, _ = cached_dataset(os.path.join(cache_dir, split), batch_size=batch_size, shuffle=shuffle, seed=args.seed,
+                                  num_shards=num_shards, shard_index=shard_index, repeat=True)
+        if shuffle and AUGMENT:
+            ds = augment_dataset(ds, seed=args.seed)
+        return with_class_weights(ds, class_weights) if class_weights else ds
+    return distribute_sharded(strategy, make_dataset, global_batch)
 
-train_gen = train_datagen.flow_from_directory(
-    os.path.join(DATASET_DIR, "train"),
-    target_size=IMAGE_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode="binary"
-)
-val_gen = val_datagen.flow_from_directory(
-    os.path.join(DATASET_DIR, "val"),
-    target_size=IMAGE_SIZE,
-    batch_size=BATCH_SIZE,
-    class_mode="binary"
-)
+if multiworker:
+    # Only the index and labels here; the pipelines are built per worker below
+    train_cache = CachedImages(os.path.join(cache_dir, "train"))
+    train_index, train_classes = train_cache.index, train_cache.labels
+    val_count = len(CachedImages(os.path.join(cache_dir, "val")))
+else:
+    train_gen, train_index, train_classes = load_split(
+        os.path.join(args.dataset_dir, "train"), os.path.join(cache_dir, "train"),
+        image_size=IMAGE_SIZE, batch_size=global_batch, shuffle=True, seed=args.seed)
+    if AUGMENT:
+        train_gen = augment_dataset(train_gen, seed=args.seed)
+    val_gen, val_index, _ = load_split(os.path.join(args.dataset_dir, "val"), os.path.join(cache_dir, "val"),
+                                       image_size=IMAGE_SIZE, batch_size=global_batch, seed=args.seed)
+print("✅ Class indices:", train_index["class_indices"])
+print(f"🧮 {replicas} replica(s) x {args.accum_steps} micro-batch(es) x {args.batch_size} = {global_batch} images per step, "
+      f"policy {'mixed_bfloat16' if args.mixed_precision else 'float32'}")
 
 # ========================
 # ⚖️ Class Weights
 # ========================
-classes = train_gen.classes
+classes = train_classes
 class_weights = compute_class_weight('balanced', classes=np.unique(classes), y=classes)
 class_weights = dict(enumerate(class_weights))
 print("📊 Class Weights:", class_weights)
 
+if multiworker:
+    # Class weights travel with the batches as sample weights
+    train_gen = worker_dataset("train", shuffle=True, class_weights=class_weights)
+    val_gen = worker_dataset("val")
+
 # ========================
 # 🧠 Model Architecture
 # ========================
-base_model = MobileNetV2(weights='imagenet', include_top=False, input_tensor=Input(shape=(224, 224, 3)))
-base_model.trainable = False  # Freeze initially
-
-x = base_model.output
-x = GlobalAveragePooling2D()(x)
-x = Dropout(0.3)(x)
-x = Dense(128, activation='relu')(x)
-x = Dropout(0.3)(x)
-output = Dense(1, activation='sigmoid')(x)
+def build_model():
+    model, base_model = build_image_classifier(weights='imagenet', image_size=IMAGE_SIZE)  # Base starts frozen
+    if args.accum_steps > 1:
+        model = GradientAccumulationModel(model.inputs, model.outputs, micro_batch_size=args.batch_size)
+    return model, base_model
 
-model = Model(inputs=base_model.input, outputs=output)
-model.compile(optimizer=Adam(learning_rate=1e-4), loss='binary_crossentropy', metrics=['accuracy'])
+with strategy.scope():
+    model, base_model = build_model()
+    model.compile(optimizer=Adam(learning_rate=1e-4), loss='binary_crossentropy', metrics=['accuracy'])
 
 model.summary()
 
 # ========================
 # 📦 Callbacks
 # ========================
-checkpoint = ModelCheckpoint(MODEL_PATH, monitor='val_accuracy', save_best_only=True, verbose=1)
+weights_path = worker_path(MODEL_PATH.replace(".h5", ".weights.h5"))
+if plain_run:
+    checkpoint = ModelCheckpoint(MODEL_PATH, monitor='val_accuracy', save_best_only=True, verbose=1)
+else:
+    checkpoint = ModelCheckpoint(weights_path, monitor='val_accuracy', save_best_only=True, save_weights_only=True, verbose=1)
 earlystop = EarlyStopping(monitor='val_accuracy', patience=5, restore_best_weights=True)
-csv_logger = CSVLogger('training_log.csv')
-
-# 🛠️ Callback to unfreeze after N epochs
-class UnfreezeCallback(Callback):
-    def on_epoch_begin(self, epoch, logs=None):
-        if epoch == FINE_TUNE_AT:
-            print(f"\n🔓 Unfreezing base model at epoch {epoch}")
-            base_model.trainable = True
-            model.compile(optimizer=Adam(1e-5), loss='binary_crossentropy', metrics=['accuracy'])
+throughput = ThroughputCallback(global_batch)
+callbacks = [checkpoint, earlystop, throughput]
+if is_chief():
+    # Appends so the fine-tune phase continues the same log
+    if os.path.exists('training_log.csv'):
+        os.remove('training_log.csv')
+    callbacks.append(CSVLogger('training_log.csv', append=True))
 
 # ========================
 # 🚀 Training
 # ========================
-history = model.fit(
-    train_gen,
-    epochs=EPOCHS,
-    validation_data=val_gen,
-    class_weight=class_weights,
-    callbacks=[checkpoint, earlystop, csv_logger, UnfreezeCallback()]
-)
+# Two fit calls instead of recompiling inside a callback: the fine-tune
+# phase unfreezes the base and recompiles under the strategy scope, which
+# creates its optimizer state on every replica.
+fit_kwargs = dict(validation_data=val_gen, class_weight=class_weights, callbacks=callbacks,
+                  steps_per_epoch=args.steps_per_epoch, validation_steps=args.steps_per_epoch)
+if multiworker:
+    # The per-worker streams repeat, so epochs are counted in steps
+    fit_kwargs.update(class_weight=None,
+                      steps_per_epoch=args.steps_per_epoch or max(1, len(train_classes) // global_batch),
+                      validation_steps=args.steps_per_epoch or -(-val_count // global_batch))
+history = model.fit(train_gen, epochs=min(args.fine_tune_at, args.epochs), **fit_kwargs)
+history_dict = dict(history.history)
+
+if args.epochs > args.fine_tune_at and not earlystop.stopped_epoch:
+    print(f"\n🔓 Unfreezing base model at epoch {args.fine_tune_at}")
+    with strategy.scope():
+        base_model.trainable = True
+        model.compile(optimizer=Adam(1e-5), loss='binary_crossentropy', metrics=['accuracy'])
+    history = model.fit(train_gen, epochs=args.epochs, initial_epoch=args.fine_tune_at, **fit_kwargs)
+    for key, values in history.history.items():
+        history_dict[key] = history_dict.get(key, []) + values
+history_dict["images_per_sec"] = [e["images_per_sec"] for e in throughput.epochs]
+
+if not plain_run:
+    # Best weights across both phases, saved as a float32 model like the default run
+    if os.path.exists(weights_path):
+        model.load_weights(weights_path)
+    else:
+        print(f"⚠️ No checkpoint at {weights_path}; exporting the final weights")
+    export_float32(model, lambda: build_image_classifier(weights=None, image_size=IMAGE_SIZE)[0], worker_path(MODEL_PATH))
 
 # ========================
 # 💾 Save Training History
 # ========================
-with open(HISTORY_PATH, 'wb') as f:
-    pickle.dump(history.history, f)
+if is_chief():
+    with open(HISTORY_PATH, 'wb') as f:
+        pickle.dump(history_dict, f)
+    print("✅ Training complete. Best model saved as 'best_model.h5'")
 
-print("✅ Training complete. Best model saved as 'best_model.h5'")
+    if args.registry:
+        best = int(np.argmax(history_dict["val_accuracy"]))
+        version = register(args.registry, "image", MODEL_PATH, alias="candidate",
+                           metrics={"val_accuracy": float(history_dict["val_accuracy"][best]),
+                                    "val_loss": float(history_dict["val_loss"][best]), "best_epoch": best + 1},
+                           source={"script": "train_cnn.py", "dataset": args.dataset_dir, "strategy": args.strategy,
+                                   "mixed_precision": args.mixed_precision, "accum_steps": args.accum_steps})
+        print(f"📦 Registered as image {version} (candidate) in {args.registry}")
@@ -0,0 +1,50 @@
+import os
+import sys
+import random
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.dataset_cache import build_cache
+from utils.dataset_index import build_index, connect, leaked_sources
+from utils.distributed_training import launch_local_cluster
+
+# Local MultiWorkerMirroredStrategy cluster for train_cnn.py: N worker
+# processes on this node, each with its own TF_CONFIG and a share of the
+# cores. The leakage check and the image cache run here once, so the
+# workers only read the cache. Arguments after "--" go to train_cnn.py,
+# e.g.  python scripts/train_distributed.py --workers 2 -- --mixed-precision --accum-steps 4
+
+parser = argparse.ArgumentParser(description="Run train_cnn.py on a local multi-worker cluster.")
+parser.add_argument("--workers", type=int, default=2)
+parser.add_argument("--threads-per-worker", type=int, default=None, help="Default: cores / workers")
+parser.add_argument("--base-port", type=int, default=12345)
+parser.add_argument("--dataset-dir", default="D:/Smart_factory_ai/dataset")
+parser.add_argument("--image-size", type=int, nargs=2, default=[224, 224])
+parser.add_argument("--skip-leakage-check", action="store_true")
+parser.add_argument("--seed", type=int, default=None, help="Shuffle seed shared by all workers (default: random)")
+parser.add_argument("train_args", nargs=argparse.REMAINDER)
+args = parser.parse_args()
+
+train_args = [a for a in args.train_args if a != "--"]
+cache_dir = args.dataset_dir.rstrip("/\\") + "_cache"
+
+if not args.skip_leakage_check:
+    build_index(args.dataset_dir)
+    conn = connect(args.dataset_dir)
+    leaks = leaked_sources(conn)
+    conn.close()
+    if leaks:
+        sys.exit(f"❌ {len(leaks)} source images are in both train and val; run scripts/check_dataset.py for details")
+for split in ("train", "val"):
+    index = build_cache(os.path.join(args.dataset_dir, split), os.path.join(cache_dir, split), tuple(args.image_size))
+    print(f"✅ {split}: {index['count']} images cached")
+
+# One seed for the whole run so it can be repeated; a --seed after "--" still wins
+seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+print(f"🚀 Starting {args.workers} workers x {threads} threads")
+script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "train_cnn.py")
+codes = launch_local_cluster([script, "--strategy", "multiworker", "--dataset-dir", args.dataset_dir, "--seed", str(seed)] + train_args,
+                             args.workers, args.base_port, threads)
+if any(codes):
+    sys.exit(f"❌ Worker exit codes: {codes}")
+print("✅ Distributed training complete")
@@ -1,11 +1,13 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
 from sklearn.preprocessing import MinMaxScaler
 import matplotlib.pyplot as plt
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, RepeatVector, TimeDistributed, Dense
 from tensorflow.keras.callbacks import EarlyStopping
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.sequences import create_sequences, sequence_dataset
+from utils.architectures import build_lstm_autoencoder
 
 # === Load Data ===
 df = pd.read_csv("data/sensors/sensor_data.csv", parse_dates=["timestamp"])
@@ -16,30 +18,20 @@ scaler = MinMaxScaler()
 df_normal[features] = scaler.fit_transform(df_normal[features])
 
 # === Create Sliding Windows ===
-def create_sequences(data, window_size=30):
-    sequences = []
-    for i in range(len(data) - window_size):
-        seq = data[i:i+window_size]
-        sequences.append(seq)
-    return np.array(sequences)
-
+# Windows are sliced per batch inside tf.data, never materialized all at once
 window_size = 30
-X_train = create_sequences(df_normal[features].values, window_size)
+X_train = create_sequences(df_normal[features].values, window_size)  # zero-copy view, for the shape only
 print(f"✅ Training sequences shape: {X_train.shape}")  # (samples, time_steps, features)
+train_ds = sequence_dataset(df_normal[features].values, window_size, batch_size=32, shuffle=True)
 
 # === Build LSTM Autoencoder ===
-model = Sequential([
-    LSTM(64, activation="relu", input_shape=(window_size, len(features)), return_sequences=False),
-    RepeatVector(window_size),
-    LSTM(64, activation="relu", return_sequences=True),
-    TimeDistributed(Dense(len(features)))
-])
+model = build_lstm_autoencoder(window_size, len(features))
 model.compile(optimizer="adam", loss="mse")
 model.summary()
 
 # === Train ===
 early_stop = EarlyStopping(monitor='loss', patience=5, restore_best_weights=True)
-history = model.fit(X_train, X_train, epochs=50, batch_size=32, callbacks=[early_stop], verbose=1)
+history = model.fit(train_ds, epochs=50, callbacks=[early_stop], verbose=1)
 
 # === Save Model & Scaler ===
 os.makedirs("models", exist_ok=True)
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.alert_engine import AlertDispatcher
+
+
+class RecordingDispatcher(AlertDispatcher):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.deliveries = []
+
+    def _deliver(self, title, message, voice=None):
+        self.sent += 1
+        self.deliveries.append((title, message))
+
+
+def test_unique_messages_under_one_title_become_one_digest():
+    dispatcher = RecordingDispatcher(dedup_window=0.2, max_per_minute=10)
+    for i in range(100):
+        dispatcher.submit("Sensor Anomaly Detected", f"At {i} | Reconstruction Error: {i / 100:.4f}")
+    time.sleep(0.6)
+    dispatcher.stop()
+    assert dispatcher.sent == 2
+    title, body = dispatcher.deliveries[1]
+    assert title == "Sensor Anomaly Detected (digest x99)"
+    assert body.count("\n") == 99
+
+
+def test_burst_of_unique_alerts_stays_within_rate_limit():
+    dispatcher = RecordingDispatcher(dedup_window=0.1, max_per_minute=10)
+    for i in range(100):
+        dispatcher.submit(f"Alert {i}", f"message {i}")
+    # Several windows close while the limit is used up; their digests wait
+    time.sleep(0.6)
+    assert dispatcher.sent <= 10
+    dispatcher.stop()
+    # Shutdown sends whatever is still held as one final digest
+    assert dispatcher.sent == 11
+    held = dispatcher.deliveries[-1][1]
+    assert all(f"Alert {i}: message {i}" in held for i in range(10, 100))
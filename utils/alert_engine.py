@@ -1,42 +1,256 @@
 import os
+import time
+import queue
+import atexit
 import smtplib
+import threading
 from email.message import EmailMessage
-import pyttsx3
 from dotenv import load_dotenv
 load_dotenv()
 
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 465))
+SMTP_SSL = os.getenv("SMTP_SSL", "on") == "on"
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))  # Seconds before an unused connection is closed
+ALERT_DEDUP_WINDOW = float(os.getenv("ALERT_DEDUP_WINDOW", 60))  # Seconds repeats of one alert are folded into a digest
+ALERT_MAX_PER_MINUTE = int(os.getenv("ALERT_MAX_PER_MINUTE", 10))
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", 1000))
+
+def _email_settings():
+    return os.getenv("SENDER_EMAIL"), os.getenv("SENDER_PASS"), os.getenv("RECEIVER_EMAIL")
+
+def _build_email(subject, body, sender, receiver):
+    msg = EmailMessage()
+    msg.set_content(body)
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = receiver
+    return msg
+
 def send_email(subject, body):
-    sender = os.getenv("SENDER_EMAIL")
-    password = os.getenv("SENDER_PASS")
-    receiver = os.getenv("RECEIVER_EMAIL")
+    sender, password, receiver = _email_settings()
 
     if not sender or not password or not receiver:
         print("⚠️ Email credentials not set properly in .env")
         return
 
     try:
-        msg = EmailMessage()
-        msg.set_content(body)
-        msg["Subject"] = subject
-        msg["From"] = sender
-        msg["To"] = receiver
+        msg = _build_email(subject, body, sender, receiver)
 
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
+        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as smtp:
             smtp.login(sender, password)
             smtp.send_message(msg)
         print("✅ Email sent successfully.")
     except Exception as e:
         print("❌ Email failed:", e)
 
-def send_alert(title, message):
-    if os.getenv("EMAIL_ALERTS", "on") == "on":
-        send_email(subject=title, body=message)
 
-    if os.getenv("VOICE_ALERTS", "on") == "on":
-        print("🔊 Voice Alert:", message)
-        engine = pyttsx3.init()
-        engine.say(message)
-        engine.runAndWait()
+class SMTPConnection:
+    # One SMTP session reused across emails. It is opened on first use,
+    # reopened once if the server dropped it, and closed after sitting idle.
+    def __init__(self, host=SMTP_HOST, port=SMTP_PORT, use_ssl=SMTP_SSL, idle_timeout=SMTP_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.idle_timeout = idle_timeout
+        self.smtp = None
+        self.last_used = 0.0
+
+    def _connect(self, sender, password):
+        cls = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        self.smtp = cls(self.host, self.port)
+        if password:
+            self.smtp.login(sender, password)
+
+    def send(self, msg, sender, password):
+        if self.smtp is None:
+            self._connect(sender, password)
+        try:
+            self.smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._connect(sender, password)
+            self.smtp.send_message(msg)
+        self.last_used = time.monotonic()
+
+    def close_if_idle(self):
+        if self.smtp is not None and time.monotonic() - self.last_used > self.idle_timeout:
+            self.close()
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except Exception:
+                pass
+            self.smtp = None
+
+
+class AlertDispatcher:
+    # Delivers alerts from a background thread so detection loops never wait
+    # on SMTP or text-to-speech. The first alert with a given dedup key is
+    # sent straight away; later ones within dedup_window are held. The key
+    # defaults to the title, so a stream of alerts that differ only in their
+    # message (timestamps, scores, file names) is one stream; callers with
+    # several sources (machines, feeds, folders) pass their own key. When
+    # windows close, everything they hold goes out as a single digest.
+    # Digests count against max_per_minute like any other send; over the
+    # limit, new alerts and due digests are held until it frees up.
+    _STOP = object()
+    _FLUSH = object()
+
+    def __init__(self, dedup_window=ALERT_DEDUP_WINDOW, max_per_minute=ALERT_MAX_PER_MINUTE,
+                 queue_size=ALERT_QUEUE_SIZE, smtp=None):
+        self.dedup_window = dedup_window
+        self.max_per_minute = max_per_minute
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.smtp = smtp or SMTPConnection()
+        self.dropped = 0
+        self.sent = 0
+        self._windows = {}  # dedup key -> {"title": title, "since": t, "held": [messages]}
+        self._sent_times = []
+        self._engine = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, title, message, dedup_key=None):
+        # Never blocks: if the queue is full the alert is counted and dropped
+        self.start()
+        try:
+            self.queue.put_nowait((title, message, title if dedup_key is None else dedup_key))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=None):
+        # Waits until queued alerts are handled; pending digests are sent too
+        self.start()
+        done = threading.Event()
+        self.queue.put((self._FLUSH, done))
+        return done.wait(timeout)
+
+    def stop(self, timeout=10):
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def _rate_ok(self, now):
+        self._sent_times = [t for t in self._sent_times if now - t < 60]
+        if len(self._sent_times) >= self.max_per_minute:
+            return False
+        self._sent_times.append(now)
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self._next_timeout())
+            except queue.Empty:
+                item = None
+            now = time.monotonic()
+            if item is self._STOP:
+                self._send_digests(now, force=True)
+                self.smtp.close()
+                return
+            if item is not None and item[0] is self._FLUSH:
+                self._send_digests(now, force=True)
+                item[1].set()
+                continue
+            if item is not None:
+                self._handle(*item, now)
+            self._send_digests(now)
+            self.smtp.close_if_idle()
+
+    def _next_timeout(self):
+        if not self._windows:
+            return max(1.0, min(self.smtp.idle_timeout, 5.0))
+        soonest = min(w["since"] for w in self._windows.values()) + self.dedup_window
+        return max(0.05, soonest - time.monotonic())
+
+    def _handle(self, title, message, key, now):
+        window = self._windows.get(key)
+        if window is None:
+            if self._rate_ok(now):
+                self._deliver(title, message)
+                self._windows[key] = {"title": title, "since": now, "held": []}
+            else:
+                self._windows[key] = {"title": title, "since": now, "held": [message]}
+        else:
+            window["held"].append(message)
+
+    def _send_digests(self, now, force=False):
+        due = [key for key, window in self._windows.items() if force or now - window["since"] >= self.dedup_window]
+        held = [self._windows[key] for key in due if self._windows[key]["held"]]
+        if held and not force and not self._rate_ok(now):
+            # Over the rate limit: keep the held alerts for another window
+            for window in held:
+                window["since"] = now
+            due = [key for key in due if not self._windows[key]["held"]]
+        elif held:
+            if force:
+                self._sent_times.append(now)
+            self._deliver_digest(held)
+        for key in due:
+            del self._windows[key]
+
+    def _deliver_digest(self, windows):
+        count = sum(len(window["held"]) for window in windows)
+        titles = list(dict.fromkeys(window["title"] for window in windows))
+        title = titles[0] if len(titles) == 1 else f"{len(titles)} alert types"
+        lines = [f"{window['title']}: {message}" if len(titles) > 1 else message
+                 for window in windows for message in window["held"]]
+        body = f"{count} more alert(s) in the last {self.dedup_window:.0f}s:\n" + "\n".join(lines)
+        self._deliver(f"{title} (digest x{count})", body, voice=f"{count} more alerts: {title}")
+
+    def _deliver(self, title, message, voice=None):
+        self.sent += 1
+        if os.getenv("EMAIL_ALERTS", "on") == "on":
+            self._email(title, message)
+
+        if os.getenv("VOICE_ALERTS", "on") == "on":
+            print("🔊 Voice Alert:", voice or message)
+            self._say(voice or message)
+
+        if os.getenv("CONSOLE_ALERTS", "on") == "on":
+            print(f"📣 {title}: {message}")
+
+    def _email(self, subject, body):
+        sender, password, receiver = _email_settings()
+        if not sender or not receiver or (self.smtp.use_ssl and not password):
+            print("⚠️ Email credentials not set properly in .env")
+            return
+        try:
+            self.smtp.send(_build_email(subject, body, sender, receiver), sender, password)
+            print("✅ Email sent successfully.")
+        except Exception as e:
+            self.smtp.close()
+            print("❌ Email failed:", e)
+
+    def _say(self, text):
+        # One engine for the life of the dispatcher thread
+        try:
+            if self._engine is None:
+                import pyttsx3
+                self._engine = pyttsx3.init()
+            self._engine.say(text)
+            self._engine.runAndWait()
+        except Exception as e:
+            print("❌ Voice alert failed:", e)
+
+
+_dispatcher = None
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = AlertDispatcher()
+        # Short-lived scripts still deliver what they queued before exiting
+        atexit.register(_dispatcher.stop)
+    return _dispatcher
 
-    if os.getenv("CONSOLE_ALERTS", "on") == "on":
-        print(f"📣 {title}: {message}")
+def send_alert(title, message, dedup_key=None):
+    get_dispatcher().submit(title, message, dedup_key)
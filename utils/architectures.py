@@ -0,0 +1,30 @@
+from tensorflow.keras.applications import MobileNetV2
+from tensorflow.keras.layers import GlobalAveragePooling2D, Dense, Dropout, Input, LSTM, RepeatVector, TimeDistributed
+from tensorflow.keras.models import Model, Sequential
+
+
+def build_image_classifier(weights="imagenet", image_size=(224, 224)):
+    # MobileNetV2 base + binary head, as trained by train_cnn.py.
+    # Returns (model, base_model) so callers can freeze/unfreeze the base.
+    # weights=None gives a randomly initialized stand-in for benchmarks.
+    base_model = MobileNetV2(weights=weights, include_top=False, input_tensor=Input(shape=image_size + (3,)))
+    base_model.trainable = False  # Freeze initially
+
+    x = base_model.output
+    x = GlobalAveragePooling2D()(x)
+    x = Dropout(0.3)(x)
+    x = Dense(128, activation='relu')(x)
+    x = Dropout(0.3)(x)
+    output = Dense(1, activation='sigmoid', dtype='float32')(x)  # float32 output under mixed precision
+
+    return Model(inputs=base_model.input, outputs=output), base_model
+
+
+def build_lstm_autoencoder(window_size=30, n_features=3):
+    # LSTM autoencoder as trained by train_lstm_autoencoder.py
+    return Sequential([
+        LSTM(64, activation="relu", input_shape=(window_size, n_features), return_sequences=False),
+        RepeatVector(window_size),
+        LSTM(64, activation="relu", return_sequences=True),
+        TimeDistributed(Dense(n_features))
+    ])
@@ -0,0 +1,76 @@
+import math
+import tensorflow as tf
+
+# Same ranges as the ImageDataGenerator in scripts/augment_mvtec_all.py.
+# shear_range is in degrees, as in Keras.
+AUGMENT_SETTINGS = {
+    "rotation_range": 30,
+    "zoom_range": 0.2,
+    "width_shift_range": 0.1,
+    "height_shift_range": 0.1,
+    "brightness_range": (0.5, 1.5),
+    "shear_range": 0.2,
+    "horizontal_flip": True,
+}
+
+
+def _uniform(seed, batch_size, low, high):
+    return tf.random.stateless_uniform([batch_size], seed, minval=low, maxval=high)
+
+
+def random_transforms(seed, batch_size, height, width, settings=AUGMENT_SETTINGS):
+    # One projective transform per image (ImageProjectiveTransformV3 layout),
+    # mapping output pixels to input pixels: flip, zoom, shear and rotation
+    # about the image centre, then a shift
+    seeds = tf.random.experimental.stateless_split(seed, num=7)
+    theta = _uniform(seeds[0], batch_size, -settings["rotation_range"], settings["rotation_range"]) * (math.pi / 180)
+    zx = _uniform(seeds[1], batch_size, 1 - settings["zoom_range"], 1 + settings["zoom_range"])
+    zy = _uniform(seeds[2], batch_size, 1 - settings["zoom_range"], 1 + settings["zoom_range"])
+    tx = _uniform(seeds[3], batch_size, -settings["width_shift_range"], settings["width_shift_range"]) * width
+    ty = _uniform(seeds[4], batch_size, -settings["height_shift_range"], settings["height_shift_range"]) * height
+    shear = _uniform(seeds[5], batch_size, -settings["shear_range"], settings["shear_range"]) * (math.pi / 180)
+    if settings["horizontal_flip"]:
+        flip = tf.where(_uniform(seeds[6], batch_size, 0.0, 1.0) < 0.5, -1.0, 1.0)
+    else:
+        flip = tf.ones([batch_size])
+
+    cos, sin = tf.cos(theta), tf.sin(theta)
+    # A = rotation @ shear @ zoom @ flip, written out per element
+    a00 = cos * zx * flip
+    a01 = (-cos * tf.sin(shear) - sin * tf.cos(shear)) * zy
+    a10 = sin * zx * flip
+    a11 = (-sin * tf.sin(shear) + cos * tf.cos(shear)) * zy
+    cx, cy = (width - 1) / 2.0, (height - 1) / 2.0
+    a02 = cx - (a00 * cx + a01 * cy) + tx
+    a12 = cy - (a10 * cx + a11 * cy) + ty
+    zeros = tf.zeros([batch_size])
+    return tf.stack([a00, a01, a02, a10, a11, a12, zeros, zeros], axis=1)
+
+
+def augment_batch(images, seed, settings=AUGMENT_SETTINGS):
+    # images: float (B, H, W, C) in [0, 1]. seed: int shape [2] tensor; the
+    # same seed always gives the same augmentations.
+    shape = tf.shape(images)
+    batch_size, height, width = shape[0], shape[1], shape[2]
+    seeds = tf.random.experimental.stateless_split(seed, num=2)
+    transforms = random_transforms(seeds[0], batch_size, tf.cast(height, tf.float32), tf.cast(width, tf.float32), settings)
+    images = tf.raw_ops.ImageProjectiveTransformV3(
+        images=images, transforms=transforms, output_shape=tf.stack([height, width]),
+        fill_value=0.0, interpolation="BILINEAR", fill_mode="NEAREST",
+    )
+    low, high = settings["brightness_range"]
+    brightness = _uniform(seeds[1], batch_size, low, high)
+    return tf.clip_by_value(images * brightness[:, None, None, None], 0.0, 1.0)
+
+
+def augment_dataset(ds, seed=None, settings=AUGMENT_SETTINGS):
+    # Adds augmentation to a batched (images, labels) dataset. Each batch
+    # gets its seed from a random stream that is re-drawn every epoch, so
+    # augmentations are fresh per epoch but reproducible for a given seed.
+    seeds = tf.data.Dataset.random(seed=seed, rerandomize_each_iteration=True).batch(2)
+
+    def apply(batch, batch_seed):
+        images, labels = batch
+        return augment_batch(images, batch_seed, settings), labels
+
+    return tf.data.Dataset.zip((ds, seeds)).map(apply, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
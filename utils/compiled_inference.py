@@ -0,0 +1,99 @@
+import os
+import time
+import threading
+from collections import deque
+import numpy as np
+
+COMPILED_MAX_BATCH = int(os.getenv("COMPILED_MAX_BATCH", 1024))
+
+
+def batch_bucket(n, max_batch=COMPILED_MAX_BATCH):
+    # Smallest power of two >= n, capped at max_batch
+    return min(max_batch, 1 << max(0, int(n) - 1).bit_length())
+
+
+class LatencyStats:
+    # Keeps the last `size` call latencies for percentiles plus running totals
+    def __init__(self, size=2048):
+        self.recent = deque(maxlen=size)
+        self.calls = 0
+        self.samples = 0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, samples):
+        with self._lock:
+            self.recent.append(seconds)
+            self.calls += 1
+            self.samples += samples
+            self.total_seconds += seconds
+
+    def summary(self):
+        with self._lock:
+            recent = np.array(self.recent)
+            calls, samples, total = self.calls, self.samples, self.total_seconds
+        if not calls:
+            return {"calls": 0}
+        return {
+            "calls": calls,
+            "samples": samples,
+            "mean_ms": total / calls * 1000,
+            "p50_ms": float(np.percentile(recent, 50) * 1000),
+            "p99_ms": float(np.percentile(recent, 99) * 1000),
+        }
+
+
+class CompiledModel:
+    # Forward pass through one tf.function per batch bucket instead of
+    # model.predict(), which builds a data adapter and callback list on every
+    # call. Inputs are zero-padded up to the next power-of-two bucket so each
+    # bucket is traced once, and outputs come back as NumPy arrays.
+    def __init__(self, model, max_batch=COMPILED_MAX_BATCH):
+        import tensorflow as tf
+        self.tf = tf
+        self.model = model
+        self.max_batch = max_batch
+        self.input_shape = tuple(model.input_shape[1:])
+        self.stats = LatencyStats()
+        self._fns = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, max_batch=COMPILED_MAX_BATCH):
+        from tensorflow.keras.models import load_model
+        compiled = cls(load_model(path), max_batch)
+        compiled.path = path
+        return compiled
+
+    def _fn(self, bucket):
+        fn = self._fns.get(bucket)
+        if fn is None:
+            with self._lock:
+                fn = self._fns.get(bucket)
+                if fn is None:
+                    tf = self.tf
+                    spec = tf.TensorSpec((bucket,) + self.input_shape, tf.float32)
+                    fn = tf.function(lambda x: self.model(x, training=False), input_signature=[spec])
+                    self._fns[bucket] = fn
+        return fn
+
+    def _run(self, x):
+        n = len(x)
+        bucket = batch_bucket(n, self.max_batch)
+        if n < bucket:
+            padded = np.zeros((bucket,) + self.input_shape, dtype=np.float32)
+            padded[:n] = x
+            x = padded
+        return self._fn(bucket)(x).numpy()[:n]
+
+    def predict(self, x, batch_size=None, verbose=0):
+        # Same call shape as keras Model.predict so it drops into existing code
+        t0 = time.perf_counter()
+        x = np.asarray(x, dtype=np.float32)
+        chunk = min(batch_size or self.max_batch, self.max_batch)
+        if len(x) <= chunk:
+            y = self._run(x)
+        else:
+            y = np.concatenate([self._run(x[i:i + chunk]) for i in range(0, len(x), chunk)])
+        self.stats.record(time.perf_counter() - t0, len(x))
+        return y
@@ -0,0 +1,154 @@
+import os
+import csv
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+IMG_EXTENSIONS = (".png", ".jpg", ".jpeg")
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = ["path", "source", "size", "mtime_ns", "hash", "class", "split", "owner"]
+
+# Builds dataset/<split>/<class>/ from a plan of (source, split, class, name)
+# entries. Files are hard-linked where the filesystem allows it and copied on
+# a thread pool otherwise. manifest.csv records every output file with its
+# source's size, mtime and content hash, so a rebuild only touches entries
+# whose source changed and removes outputs that are no longer planned.
+# Every row also records the plan that placed it (owner, e.g. "merge" or
+# "split"): several plans can share one output dir, and a rebuild only ever
+# removes files its own plan placed earlier. Rows without an owner (older
+# manifests) are never removed.
+
+
+def _images(folder):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(IMG_EXTENSIONS))
+
+
+def plan_merge(mvtec_root):
+    # Same layout and names as the original merge_mvtec_to_dataset.py:
+    # train/good -> train/Good, test/good -> val/Good, test/<defect> -> val/Defective
+    plan = []
+    for obj in sorted(os.listdir(mvtec_root)):
+        obj_path = os.path.join(mvtec_root, obj)
+        if not os.path.isdir(obj_path):
+            continue
+        train_good = os.path.join(obj_path, "train", "good")
+        if os.path.isdir(train_good):
+            plan += [(os.path.join(train_good, f), "train", "Good", f"{obj}_{f}") for f in _images(train_good)]
+        test_path = os.path.join(obj_path, "test")
+        if not os.path.isdir(test_path):
+            continue
+        for defect_type in sorted(os.listdir(test_path)):
+            defect_dir = os.path.join(test_path, defect_type)
+            if not os.path.isdir(defect_dir):
+                continue
+            if defect_type == "good":
+                plan += [(os.path.join(defect_dir, f), "val", "Good", f"{obj}_{f}") for f in _images(defect_dir)]
+            else:
+                plan += [(os.path.join(defect_dir, f), "val", "Defective", f"{obj}_{defect_type}_{f}") for f in _images(defect_dir)]
+    return plan
+
+
+def split_of(name, ratio, seed):
+    # Deterministic per-file split: a file keeps its split across rebuilds
+    # and adding files never moves existing ones
+    h = hashlib.sha1(f"{seed}:{name}".encode()).digest()
+    return "train" if int.from_bytes(h[:8], "big") / 2 ** 64 < ratio else "val"
+
+
+def plan_split(input_base, classes, ratio=0.8, seed=42):
+    # Group-aware: every augmented copy of one MVTec source image lands in
+    # the same split. Files whose lineage is unknown are split individually.
+    from utils.dataset_index import source_lineage
+    plan = []
+    for cls in classes:
+        src = os.path.join(input_base, cls)
+        for f in _images(src):
+            group = source_lineage(f)[2] or f"{cls}/{f}"
+            plan.append((os.path.join(src, f), split_of(group, ratio, seed), cls, f))
+    return plan
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(output_base):
+    path = os.path.join(output_base, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="") as f:
+        return {row["path"]: row for row in csv.DictReader(f)}
+
+
+def write_manifest(output_base, rows):
+    path = os.path.join(output_base, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(rows, key=lambda r: r["path"]))
+    os.replace(tmp, path)
+
+
+def place(src, dst, use_links=True):
+    # Hard link when possible (same filesystem), otherwise copy.
+    # Returns "link" or "copy".
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if use_links:
+        try:
+            os.link(src, dst)
+            return "link"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def build(plan, output_base, owner, workers=None, use_links=True):
+    old = read_manifest(output_base)
+    for split, cls in {(split, cls) for _, split, cls, _ in plan}:
+        os.makedirs(os.path.join(output_base, split, cls), exist_ok=True)
+
+    def handle(entry):
+        src, split, cls, name = entry
+        rel = "/".join([split, cls, name])
+        dst = os.path.join(output_base, split, cls, name)
+        st = os.stat(src)
+        prev = old.get(rel)
+        row = {"path": rel, "source": src, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "class": cls, "split": split,
+               "owner": owner}
+        if prev is not None and prev["source"] == src and int(prev["size"]) == st.st_size \
+                and int(prev["mtime_ns"]) == st.st_mtime_ns and os.path.exists(dst):
+            row["hash"] = prev["hash"]
+            return row, "unchanged"
+        row["hash"] = file_hash(src)
+        return row, place(src, dst, use_links)
+
+    counts = {"unchanged": 0, "link": 0, "copy": 0, "removed": 0}
+    rows = []
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        for row, action in pool.map(handle, plan):
+            rows.append(row)
+            counts[action] += 1
+
+    # Outputs this plan placed in an earlier build and no longer plans;
+    # other plans' rows are carried over untouched
+    planned = {r["path"] for r in rows}
+    for rel, prev in old.items():
+        if rel in planned:
+            continue
+        if prev.get("owner") != owner:
+            rows.append(prev)
+            continue
+        dst = os.path.join(output_base, *rel.split("/"))
+        if os.path.lexists(dst):
+            os.remove(dst)
+        counts["removed"] += 1
+
+    write_manifest(output_base, rows)
+    return counts
@@ -0,0 +1,167 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.image_pipeline import decode_image, PREPROCESS_VERSION
+
+IMG_EXTENSIONS = (".png", ".jpg", ".jpeg")
+INDEX_FILE = "index.json"
+
+# Preprocess-once image cache for training and evaluation.
+# A split directory laid out like flow_from_directory expects
+# (<split>/<class>/<image>) is decoded and resized once into memory-mapped
+# uint8 .npy shards plus an index.json with the labels and class indices.
+# The cache is keyed by a fingerprint of every source file's path, size and
+# mtime plus the preprocessing version, so adding, removing or editing an
+# image, or changing how images are decoded, rebuilds it.
+
+
+def list_split(split_dir):
+    # Same class order and indices as flow_from_directory (sorted class dirs)
+    classes = sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+    paths, labels = [], []
+    for label, cls in enumerate(classes):
+        cls_dir = os.path.join(split_dir, cls)
+        files = sorted(f for f in os.listdir(cls_dir) if f.lower().endswith(IMG_EXTENSIONS))
+        paths += [os.path.join(cls_dir, f) for f in files]
+        labels += [label] * len(files)
+    return classes, paths, np.array(labels, dtype=np.int64)
+
+
+def fingerprint(split_dir, paths, image_size):
+    h = hashlib.sha1(json.dumps([PREPROCESS_VERSION] + list(image_size)).encode())
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{os.path.relpath(path, split_dir)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _load_uint8(path, image_size):
+    # Full decode, the same pixels as keras load_img (utils.image_pipeline)
+    return decode_image(path, image_size)
+
+
+def read_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def build_cache(split_dir, cache_dir, image_size=(224, 224), shard_size=2048, workers=None, force=False):
+    classes, paths, labels = list_split(split_dir)
+    if not paths:
+        raise ValueError(f"No images in {split_dir}; expected <split>/<class>/<image> with {', '.join(IMG_EXTENSIONS)} files")
+    fp = fingerprint(split_dir, paths, image_size)
+    index = read_index(cache_dir)
+    if not force and index is not None and index["fingerprint"] == fp:
+        return index
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Drop the old index first so an interrupted build is never reused
+    if os.path.exists(os.path.join(cache_dir, INDEX_FILE)):
+        os.remove(os.path.join(cache_dir, INDEX_FILE))
+    for f in os.listdir(cache_dir):
+        if f.startswith("shard_") and f.endswith(".npy"):
+            os.remove(os.path.join(cache_dir, f))
+
+    shards = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for n, start in enumerate(range(0, len(paths), shard_size)):
+            shard_paths = paths[start:start + shard_size]
+            name = f"shard_{n:05d}.npy"
+            out = np.lib.format.open_memmap(os.path.join(cache_dir, name), mode="w+", dtype=np.uint8,
+                                            shape=(len(shard_paths), image_size[1], image_size[0], 3))
+            for i, img in enumerate(pool.map(lambda p: _load_uint8(p, image_size), shard_paths)):
+                out[i] = img
+            out.flush()
+            del out
+            shards.append({"file": name, "count": len(shard_paths)})
+            print(f"💾 {os.path.basename(split_dir)}: {start + len(shard_paths)}/{len(paths)} images cached")
+
+    np.save(os.path.join(cache_dir, "labels.npy"), labels)
+    index = {
+        "fingerprint": fp,
+        "source": os.path.abspath(split_dir),
+        "image_size": list(image_size),
+        "classes": classes,
+        "class_indices": {c: i for i, c in enumerate(classes)},
+        "count": len(paths),
+        "shards": shards,
+    }
+    with open(os.path.join(cache_dir, INDEX_FILE), "w") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+class CachedImages:
+    # Random access over the memory-mapped shards of one cached split.
+    # in_memory=True reads the shards into RAM once instead.
+    def __init__(self, cache_dir, in_memory=False):
+        self.index = read_index(cache_dir)
+        if self.index is None:
+            raise FileNotFoundError(f"No dataset cache in {cache_dir}; build it first")
+        mmap_mode = None if in_memory else "r"
+        self.shards = [np.load(os.path.join(cache_dir, s["file"]), mmap_mode=mmap_mode) for s in self.index["shards"]]
+        self.offsets = np.cumsum([0] + [s["count"] for s in self.index["shards"]])
+        # image_size is (width, height) like PIL; arrays are (height, width, 3)
+        width, height = self.index["image_size"]
+        self.image_shape = (height, width, 3)
+        self.labels = np.load(os.path.join(cache_dir, "labels.npy"))
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def gather(self, idx):
+        # Images for a batch of global indices, read in sorted order per shard
+        idx = np.asarray(idx)
+        out = np.empty((len(idx),) + self.image_shape, dtype=np.uint8)
+        shard_ids = np.searchsorted(self.offsets, idx, side="right") - 1
+        for s in np.unique(shard_ids):
+            mask = shard_ids == s
+            out[mask] = self.shards[s][idx[mask] - self.offsets[s]]
+        return out
+
+
+def cached_dataset(cache_dir, batch_size=32, shuffle=False, seed=None, cache_in_memory=False,
+                   num_shards=1, shard_index=0, repeat=False):
+    # tf.data pipeline of (image / 255, label) batches read from the shards.
+    # Indices are shuffled and batched, images for each batch are gathered in
+    # parallel map calls, and the next batches are prefetched while the
+    # model trains. With num_shards > 1 only every num_shards-th index from
+    # shard_index on is kept, before anything is read, so each worker decodes
+    # only its own part. repeat=True gives an endless stream of full batches.
+    import tensorflow as tf
+
+    images = CachedImages(cache_dir, in_memory=cache_in_memory)
+    labels = images.labels.astype(np.float32)
+    h, w, c = images.image_shape
+
+    def load_batch(idx):
+        return images.gather(idx), labels[idx]
+
+    def tf_load_batch(idx):
+        x, y = tf.numpy_function(load_batch, [idx], [tf.uint8, tf.float32])
+        x.set_shape([None, h, w, c])
+        y.set_shape([None])
+        return x, y
+
+    ds = tf.data.Dataset.range(len(images))
+    if num_shards > 1:
+        ds = ds.shard(num_shards, shard_index)
+    if shuffle:
+        ds = ds.shuffle(len(range(shard_index, len(images), num_shards)), seed=seed, reshuffle_each_iteration=True)
+    if repeat:
+        ds = ds.repeat()
+    ds = ds.batch(batch_size).map(tf_load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, y), num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE), images.index, images.labels
+
+
+def load_split(split_dir, cache_dir, image_size=(224, 224), batch_size=32, shuffle=False, seed=None, cache_in_memory=False):
+    # Builds (or reuses) the cache for one split and returns
+    # (dataset, index, labels) for training or evaluation
+    build_cache(split_dir, cache_dir, image_size)
+    return cached_dataset(cache_dir, batch_size, shuffle, seed, cache_in_memory)
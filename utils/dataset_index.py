@@ -0,0 +1,215 @@
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.dataset_builder import IMG_EXTENSIONS, read_manifest
+
+INDEX_NAME = "index.sqlite"
+
+# SQLite index over a built dataset (<dataset>/<split>/<class>/<image>).
+# One row per image with its MVTec category, defect type, source image ID,
+# whether it is an augmented copy, and a 64-bit perceptual hash (dHash).
+# Lineage comes from the builder's manifest.csv source paths and from the
+# file naming used by merge_mvtec_to_dataset.py and augment_mvtec_all.py.
+# Rebuilds only re-hash images whose size or mtime changed.
+
+MVTEC_CATEGORIES = (
+    "bottle", "cable", "capsule", "carpet", "grid", "hazelnut", "leather", "metal_nut",
+    "pill", "screw", "tile", "toothbrush", "transistor", "wood", "zipper",
+)
+_CATEGORY = "|".join(sorted(MVTEC_CATEGORIES, key=len, reverse=True))
+# augment_mvtec_all.py: aug_<category>_<train|test>_<defect>_<image>_<n>_<rand>.png
+AUG_NAME = re.compile(rf"^aug_(?P<category>{_CATEGORY})_(?P<split>train|test)_(?P<defect>.+)_(?P<image>[^_]+)_\d+_\d+\.\w+$")
+# merge_mvtec_to_dataset.py: <category>_<image>.png (good) or <category>_<defect>_<image>.png
+MERGED_NAME = re.compile(rf"^(?P<category>{_CATEGORY})_(?:(?P<defect>.+)_)?(?P<image>[^_]+)\.\w+$")
+
+SCHEMA = """
+CREATE TABLE images (
+    path TEXT PRIMARY KEY,
+    split TEXT NOT NULL,
+    class TEXT NOT NULL,
+    category TEXT,
+    defect TEXT,
+    source_id TEXT,
+    augmented INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT,
+    phash TEXT
+);
+CREATE INDEX images_source ON images (source_id);
+CREATE INDEX images_phash ON images (phash);
+CREATE INDEX images_split_class ON images (split, class);
+"""
+COLUMNS = ["path", "split", "class", "category", "defect", "source_id", "augmented", "size", "mtime_ns", "sha1", "phash"]
+
+
+def source_lineage(path, split=None):
+    # (category, defect, source_id) for an image path, or Nones when the
+    # origin cannot be told. source_id is <category>/<train|test>/<defect>/<image>
+    # in MVTec terms, shared by a source image and all its augmented copies.
+    parts = path.replace("\\", "/").split("/")
+    name = parts[-1]
+    m = AUG_NAME.match(name)
+    if m:
+        return m["category"], m["defect"], f"{m['category']}/{m['split']}/{m['defect']}/{m['image']}"
+    if len(parts) >= 4 and parts[-4] in MVTEC_CATEGORIES and parts[-3] in ("train", "test"):
+        image = os.path.splitext(name)[0]
+        return parts[-4], parts[-2], f"{parts[-4]}/{parts[-3]}/{parts[-2]}/{image}"
+    m = MERGED_NAME.match(name)
+    if m and split is not None:
+        # Merged good images come from train/good for train and test/good for val
+        defect = m["defect"] or "good"
+        mvtec_split = "train" if defect == "good" and split == "train" else "test"
+        return m["category"], defect, f"{m['category']}/{mvtec_split}/{defect}/{m['image']}"
+    return None, None, None
+
+
+def dhash(path, hash_size=8):
+    # 64-bit difference hash as 16 hex chars; None if the image can't be read
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            img.draft("L", (hash_size * 4, hash_size * 4))  # JPEG: decode at reduced scale
+            px = np.asarray(img.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    except OSError:
+        return None
+    bits = np.packbits((px[:, 1:] > px[:, :-1]).ravel())
+    return bits.tobytes().hex()
+
+
+def index_path(dataset_dir):
+    return os.path.join(dataset_dir, INDEX_NAME)
+
+
+def connect(dataset_dir):
+    return sqlite3.connect(index_path(dataset_dir))
+
+
+def _scan(dataset_dir):
+    for split in sorted(os.listdir(dataset_dir)):
+        split_dir = os.path.join(dataset_dir, split)
+        if not os.path.isdir(split_dir) or split.startswith("."):
+            continue
+        for cls in sorted(os.listdir(split_dir)):
+            cls_dir = os.path.join(split_dir, cls)
+            if not os.path.isdir(cls_dir):
+                continue
+            with os.scandir(cls_dir) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(IMG_EXTENSIONS):
+                        st = entry.stat()
+                        yield f"{split}/{cls}/{entry.name}", split, cls, st.st_size, st.st_mtime_ns
+
+
+def _read_rows(db_path):
+    if not os.path.exists(db_path):
+        return {}
+    try:
+        with sqlite3.connect(db_path) as conn:
+            cur = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM images")
+            return {row[0]: dict(zip(COLUMNS, row)) for row in cur}
+    except sqlite3.DatabaseError:
+        return {}
+
+
+def build_index(dataset_dir, workers=None, force=False):
+    # Scans the dataset, hashes new or changed images on a thread pool (PIL
+    # releases the GIL while decoding and resizing, so this uses every core)
+    # and writes the index atomically. Returns (rows indexed, rows re-hashed).
+    db_path = index_path(dataset_dir)
+    old = {} if force else _read_rows(db_path)
+    manifest = read_manifest(dataset_dir)
+
+    rows, todo = [], []
+    for rel, split, cls, size, mtime_ns in _scan(dataset_dir):
+        source = manifest.get(rel, {}).get("source")
+        category, defect, source_id = source_lineage(source, split) if source else (None, None, None)
+        if source_id is None:
+            category, defect, source_id = source_lineage(rel, split)
+        name = rel.rsplit("/", 1)[-1]
+        augmented = int(name.startswith("aug_") or (source is not None and os.path.basename(source).startswith("aug_")))
+        row = {"path": rel, "split": split, "class": cls, "category": category, "defect": defect,
+               "source_id": source_id, "augmented": augmented, "size": size, "mtime_ns": mtime_ns,
+               "sha1": manifest.get(rel, {}).get("hash"), "phash": None}
+        prev = old.get(rel)
+        if prev is not None and prev["size"] == size and prev["mtime_ns"] == mtime_ns and prev["phash"] is not None:
+            row["phash"] = prev["phash"]
+        else:
+            todo.append(row)
+        rows.append(row)
+
+    if todo:
+        paths = [os.path.join(dataset_dir, *r["path"].split("/")) for r in todo]
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for row, h in zip(todo, pool.map(dhash, paths)):
+                row["phash"] = h
+
+    tmp = db_path + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    with sqlite3.connect(tmp) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany(f"INSERT INTO images VALUES ({', '.join('?' * len(COLUMNS))})",
+                         [[r[c] for c in COLUMNS] for r in rows])
+    conn.close()
+    os.replace(tmp, db_path)
+    return len(rows), len(todo)
+
+
+# === Queries ===
+
+def leaked_sources(conn):
+    # Source images with copies in more than one split:
+    # [(source_id, "train,val", n_images), ...]
+    return conn.execute("""
+        SELECT source_id, GROUP_CONCAT(DISTINCT split), COUNT(*) FROM images
+        WHERE source_id IS NOT NULL
+        GROUP BY source_id HAVING COUNT(DISTINCT split) > 1
+        ORDER BY source_id
+    """).fetchall()
+
+
+def duplicate_hashes(conn, max_distance=0):
+    # Pairs of images in different splits whose perceptual hashes differ in
+    # at most max_distance bits: [(path_a, path_b, distance), ...]. Hashes are
+    # split into max_distance + 1 bands; any such pair shares at least one
+    # band exactly, so only images in the same band bucket are compared.
+    rows = conn.execute("SELECT path, split, phash FROM images WHERE phash IS NOT NULL").fetchall()
+    n_bands = max_distance + 1
+    bounds = np.linspace(0, 64, n_bands + 1).astype(int).tolist()
+    values = [(path, split, int(h, 16)) for path, split, h in rows]
+    pairs = set()
+    for b in range(n_bands):
+        lo, width = bounds[b], bounds[b + 1] - bounds[b]
+        buckets = {}
+        for item in values:
+            buckets.setdefault((item[2] >> lo) & ((1 << width) - 1), []).append(item)
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            for i, (pa, sa, ha) in enumerate(bucket):
+                for pb, sb, hb in bucket[i + 1:]:
+                    if sa != sb:
+                        d = bin(ha ^ hb).count("1")
+                        if d <= max_distance:
+                            pairs.add((min(pa, pb), max(pa, pb), d))
+    return sorted(pairs)
+
+
+def class_balance(conn):
+    # [(split, class, n_images), ...]
+    return conn.execute("SELECT split, class, COUNT(*) FROM images GROUP BY split, class ORDER BY split, class").fetchall()
+
+
+def category_counts(conn):
+    # [(category, split, class, n_images), ...]; unknown lineage is reported as None
+    return conn.execute("""
+        SELECT category, split, class, COUNT(*) FROM images
+        GROUP BY category, split, class ORDER BY category IS NULL, category, split, class
+    """).fetchall()
+
+
+def unknown_lineage(conn):
+    return conn.execute("SELECT COUNT(*) FROM images WHERE source_id IS NULL").fetchone()[0]
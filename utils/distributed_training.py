@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import tensorflow as tf
+from tensorflow.keras.models import Model
+from tensorflow.keras.callbacks import Callback
+
+STRATEGIES = ("none", "mirrored", "multiworker")
+
+# Helpers for the distributed / mixed-precision training mode of
+# train_cnn.py and benchmarks/training_throughput.py.
+
+
+def bf16_supported():
+    # True on CPUs with native bfloat16 (AVX512_BF16 or AMX). Elsewhere the
+    # mixed_bfloat16 policy still runs, but usually slower than float32.
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def set_precision(mixed):
+    # Must be called before the model is built
+    if mixed and not bf16_supported():
+        print("⚠️ This CPU has no native bfloat16; mixed precision may be slower than float32")
+    tf.keras.mixed_precision.set_global_policy("mixed_bfloat16" if mixed else "float32")
+
+
+def make_strategy(kind):
+    # "multiworker" reads the cluster from TF_CONFIG (see launch_local_cluster)
+    # and must be created before any other TensorFlow op runs
+    if kind == "multiworker":
+        return tf.distribute.MultiWorkerMirroredStrategy()
+    if kind == "mirrored":
+        return tf.distribute.MirroredStrategy()
+    return tf.distribute.get_strategy()
+
+
+def is_chief():
+    # Worker 0 (or an explicit chief task) in TF_CONFIG; always True without a cluster
+    task = json.loads(os.environ.get("TF_CONFIG", "{}")).get("task", {})
+    if task.get("type") == "chief":
+        return True
+    return task.get("type", "worker") == "worker" and task.get("index", 0) == 0
+
+
+def worker_path(path):
+    # Every multi-worker process has to save; only the chief writes the real file
+    if is_chief():
+        return path
+    task = json.loads(os.environ["TF_CONFIG"])["task"]
+    return os.path.join(tempfile.gettempdir(), f"worker{task['index']}_{os.path.basename(path)}")
+
+
+def shard_by_data(ds):
+    # For synthetic or in-memory datasets, where building the whole pipeline
+    # on every worker is cheap: each worker keeps every Nth element
+    options = tf.data.Options()
+    options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.DATA
+    return ds.with_options(options)
+
+
+def distribute_sharded(strategy, make_dataset, global_batch_size):
+    # One input pipeline per worker. make_dataset(num_shards, shard_index,
+    # batch_size) has to keep only its shard of the data before decoding and
+    # batch it per replica; tf.data auto-sharding is not applied on top.
+    # Keras cannot tell when a distributed dataset ends, so it should repeat
+    # and fit needs steps_per_epoch and validation_steps.
+    def dataset_fn(context):
+        return make_dataset(context.num_input_pipelines, context.input_pipeline_id,
+                            context.get_per_replica_batch_size(global_batch_size))
+    return strategy.distribute_datasets_from_function(dataset_fn)
+
+
+def with_class_weights(ds, class_weights):
+    # class_weight as per-sample weights; fit() only applies class_weight
+    # itself to plain tf.data datasets, not distributed ones
+    weights = tf.constant([class_weights[c] for c in sorted(class_weights)], tf.float32)
+    return ds.map(lambda x, y: (x, y, tf.gather(weights, tf.cast(y, tf.int32))), num_parallel_calls=tf.data.AUTOTUNE)
+
+
+class GradientAccumulationModel(Model):
+    # Functional model whose train_step splits each (per-replica) batch into
+    # micro-batches of micro_batch_size, sums their gradients and applies
+    # them once. Peak activation memory is that of one micro-batch while the
+    # optimizer sees the whole batch. apply_gradients runs on every step, so
+    # the cross-replica all-reduce works unchanged under any tf.distribute
+    # strategy.
+    def __init__(self, *args, micro_batch_size=32, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.micro_batch_size = micro_batch_size
+
+    def train_step(self, data):
+        x, y, sample_weight = tf.keras.utils.unpack_x_y_sample_weight(data)
+        n = tf.shape(x)[0]
+        if sample_weight is None:
+            sample_weight = tf.ones([n])
+        steps = (n + self.micro_batch_size - 1) // self.micro_batch_size
+        variables = self.trainable_variables
+
+        def body(i, grads):
+            lo = i * self.micro_batch_size
+            hi = tf.minimum(lo + self.micro_batch_size, n)
+            xb, yb, wb = x[lo:hi], y[lo:hi], sample_weight[lo:hi]
+            with tf.GradientTape() as tape:
+                y_pred = self(xb, training=True)
+                loss = self.compiled_loss(yb, y_pred, wb, regularization_losses=self.losses)
+                # compiled_loss is a micro-batch mean; weight it by its share of the batch
+                loss = loss * tf.cast(hi - lo, loss.dtype) / tf.cast(n, loss.dtype)
+            self.compiled_metrics.update_state(yb, y_pred, wb)
+            return i + 1, [g + dg for g, dg in zip(grads, tape.gradient(loss, variables))]
+
+        _, grads = tf.while_loop(lambda i, _: i < steps, body, [tf.constant(0), [tf.zeros_like(v) for v in variables]],
+                                 parallel_iterations=1)
+        self.optimizer.apply_gradients(zip(grads, variables))
+        return {m.name: m.result() for m in self.metrics}
+
+
+class ThroughputCallback(Callback):
+    # Training images/sec per epoch (train steps only, validation excluded)
+    def __init__(self, global_batch_size):
+        super().__init__()
+        self.global_batch_size = global_batch_size
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.steps = 0
+        self.start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.steps += 1
+        self.end = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = max(getattr(self, "end", self.start) - self.start, 1e-9)
+        images_per_sec = self.steps * self.global_batch_size / elapsed
+        self.epochs.append({"epoch": epoch, "steps": self.steps, "seconds": elapsed, "images_per_sec": images_per_sec})
+        print(f"\n⚡ Epoch {epoch + 1}: {images_per_sec:.1f} images/sec")
+
+
+def export_float32(model, build_fn, path):
+    # Saves a plain float32 copy of a (mixed-precision and/or accumulating)
+    # model, so the .h5 loads and serves exactly like one from the default mode
+    policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy("float32")
+    try:
+        plain = build_fn()
+        plain.set_weights(model.get_weights())
+        plain.save(path)
+    finally:
+        tf.keras.mixed_precision.set_global_policy(policy)
+
+
+def cluster_env(n_workers, index, base_port=12345):
+    env = dict(os.environ)
+    env["TF_CONFIG"] = json.dumps({
+        "cluster": {"worker": [f"localhost:{base_port + i}" for i in range(n_workers)]},
+        "task": {"type": "worker", "index": index},
+    })
+    return env
+
+
+def launch_local_cluster(command, n_workers, base_port=12345, threads_per_worker=None):
+    # Runs `command` once per worker with TF_CONFIG for a single-node
+    # MultiWorkerMirroredStrategy cluster. Returns the workers' exit codes.
+    procs = []
+    for i in range(n_workers):
+        env = cluster_env(n_workers, i, base_port)
+        if threads_per_worker:
+            env["TF_NUM_INTRAOP_THREADS"] = str(threads_per_worker)
+            env["TF_NUM_INTEROP_THREADS"] = "1"
+        procs.append(subprocess.Popen([sys.executable] + list(command), env=env))
+    try:
+        return [p.wait() for p in procs]
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        raise
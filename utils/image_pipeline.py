@@ -0,0 +1,102 @@
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+IMG_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# Preprocessing shared by training, the backend and the inference scripts:
+# decode to RGB, resize to img_size (nearest, like keras load_img), keep
+# uint8 until the batch is assembled, then rescale to [0, 1] float32 in one
+# pass. By default the pixels are exactly those of keras load_img, which
+# training and the batch scripts have always used. draft=True (the API,
+# infer_all.py --fast-decode) decodes JPEGs in draft mode instead, where
+# libjpeg scales by 1/2, 1/4 or 1/8 during the DCT as long as the result
+# still covers img_size, so a 5 MP camera upload is never materialized at
+# full resolution; the pixels then differ slightly from the full decode.
+# Bump PREPROCESS_VERSION whenever the output pixels change (it is part of
+# the dataset cache fingerprint).
+PREPROCESS_VERSION = 3
+
+
+def list_images(img_dir):
+    return [os.path.join(img_dir, f) for f in sorted(os.listdir(img_dir)) if f.lower().endswith(IMG_EXTENSIONS)]
+
+
+def decode_image(source, img_size=(224, 224), out=None, draft=False):
+    # source: path, file object or encoded bytes. Returns (or fills `out`
+    # with) a (height, width, 3) uint8 RGB array.
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with Image.open(source) as img:
+        if draft:
+            img.draft("RGB", img_size)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.size != tuple(img_size):
+            img = img.resize(img_size, Image.NEAREST)
+        if out is None:
+            return np.asarray(img, dtype=np.uint8)
+        out[...] = np.asarray(img)
+        return out
+
+
+def normalize(batch, out=None):
+    # uint8 [0, 255] -> float32 [0, 1], written into `out` when given
+    return np.divide(batch, np.float32(255.0), out=out, dtype=np.float32)
+
+
+def frames_to_batch(frames, out=None):
+    # OpenCV frames/ROIs (BGR uint8, already img_size) -> float32 RGB batch,
+    # so camera input matches what the model was trained on
+    batch = np.stack(frames)[..., ::-1]
+    if out is not None:
+        out = out[:len(frames)]
+    return normalize(batch, out=out)
+
+
+def load_image(path, img_size=(224, 224), draft=False):
+    return normalize(decode_image(path, img_size, draft=draft))
+
+
+class BatchBuffer:
+    # Preallocated uint8 staging and float32 model-input buffers for batches
+    # of up to max_batch_size images. Images are decoded straight into their
+    # slot; normalized() rescales the first n slots into the float32 buffer,
+    # which is overwritten by the next call.
+    def __init__(self, max_batch_size, img_size=(224, 224)):
+        shape = (max_batch_size, img_size[1], img_size[0], 3)
+        self.uint8 = np.empty(shape, dtype=np.uint8)
+        self.float32 = np.empty(shape, dtype=np.float32)
+
+    def normalized(self, n):
+        return normalize(self.uint8[:n], out=self.float32[:n])
+
+
+def iter_image_batches(paths, img_size=(224, 224), batch_size=32, workers=None, prefetch=2, draft=False):
+    # Yields (batch_paths, batch_array) in input order. Images are decoded
+    # on a thread pool, and up to `prefetch` batches beyond the current one
+    # are already being decoded while the caller runs the model. Decoding
+    # writes into a ring of prefetch + 1 preallocated uint8 buffers; the
+    # yielded float32 array is reused, so copy it to keep it past the next
+    # iteration.
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    ring = [np.empty((batch_size, img_size[1], img_size[0], 3), dtype=np.uint8) for _ in range(prefetch + 1)]
+    x = np.empty(ring[0].shape, dtype=np.float32)
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        pending = deque()
+        next_batch = 0
+        while next_batch < len(batches) or pending:
+            while next_batch < len(batches) and len(pending) <= prefetch:
+                batch_paths = batches[next_batch]
+                buf = ring[next_batch % len(ring)]
+                futures = [pool.submit(decode_image, p, img_size, buf[i], draft) for i, p in enumerate(batch_paths)]
+                pending.append((batch_paths, buf, futures))
+                next_batch += 1
+            batch_paths, buf, futures = pending.popleft()
+            for f in futures:
+                f.result()
+            n = len(batch_paths)
+            yield batch_paths, normalize(buf[:n], out=x[:n])
@@ -0,0 +1,105 @@
+import os
+import hashlib
+import threading
+import numpy as np
+
+# Which runtime the scripts and the backend use for inference:
+#   compiled - the .h5 model through per-batch-bucket tf.functions (default,
+#              see utils/compiled_inference.py)
+#   keras    - the .h5 model through keras model.predict
+#   tflite   - the exported .tflite next to it (see scripts/export_tflite.py)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "compiled")
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", os.cpu_count() or 1))
+
+
+class KerasBackend:
+    def __init__(self, path):
+        from tensorflow.keras.models import load_model
+        self.path = path
+        self.model = load_model(path)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        return self.model.predict(x, batch_size=batch_size, verbose=verbose)
+
+
+class TFLiteBackend:
+    # Runs a .tflite model behind the same predict() call as Keras. Quantized
+    # (int8/uint8) inputs and outputs are converted from/to float here, so
+    # callers always pass and get the same float arrays as with the .h5 model.
+    def __init__(self, path, num_threads=TFLITE_NUM_THREADS):
+        import tensorflow as tf
+        self.path = path
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = None
+        # The interpreter is not thread-safe
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        if batch_size != self.batch_size:
+            shape = list(self.input["shape"])
+            shape[0] = batch_size
+            self.interpreter.resize_tensor_input(self.input["index"], shape)
+            self.interpreter.allocate_tensors()
+            self.input = self.interpreter.get_input_details()[0]
+            self.output = self.interpreter.get_output_details()[0]
+            self.batch_size = batch_size
+
+    def _run(self, x):
+        self._resize(len(x))
+        if self.input["dtype"] in (np.int8, np.uint8):
+            scale, zero_point = self.input["quantization"]
+            info = np.iinfo(self.input["dtype"])
+            x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+        self.interpreter.set_tensor(self.input["index"], np.asarray(x, dtype=self.input["dtype"]))
+        self.interpreter.invoke()
+        y = self.interpreter.get_tensor(self.output["index"])
+        if self.output["dtype"] in (np.int8, np.uint8):
+            scale, zero_point = self.output["quantization"]
+            y = (y.astype(np.float32) - zero_point) * scale
+        return y.astype(np.float32, copy=False)
+
+    def predict(self, x, batch_size=None, verbose=0):
+        batch_size = batch_size or 32
+        if len(x) == 0:
+            return np.empty((0,) + tuple(self.output["shape"][1:]), dtype=np.float32)
+        with self._lock:
+            return np.concatenate([self._run(x[i:i + batch_size]) for i in range(0, len(x), batch_size)])
+
+
+def _compiled_backend(path):
+    from utils.compiled_inference import CompiledModel
+    return CompiledModel.load(path)
+
+
+BACKENDS = {"compiled": _compiled_backend, "keras": KerasBackend, "tflite": TFLiteBackend}
+
+
+def resolve_model_path(path, backend=None):
+    # models/best_model.h5 -> models/best_model.tflite when the TFLite backend is selected
+    backend = backend or INFERENCE_BACKEND
+    if backend == "tflite" and path.endswith(".h5"):
+        return os.path.splitext(path)[0] + ".tflite"
+    return path
+
+
+def model_version(path, backend=None):
+    # Backend plus a content hash of the file it serves, so retraining in
+    # place or switching backends gives a new version
+    backend = "tflite" if path.endswith(".tflite") else (backend or INFERENCE_BACKEND)
+    h = hashlib.sha1()
+    with open(resolve_model_path(path, backend), "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return f"{backend}:{h.hexdigest()[:16]}"
+
+
+def load_inference_model(path, backend=None):
+    # Scripts call this in place of keras load_model(); a .tflite path always
+    # gets the TFLite backend, otherwise INFERENCE_BACKEND decides
+    backend = "tflite" if path.endswith(".tflite") else (backend or INFERENCE_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](resolve_model_path(path, backend))
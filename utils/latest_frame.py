@@ -0,0 +1,26 @@
+import threading
+
+
+class LatestFrame:
+    # Holds only the newest frame; older frames are overwritten, never queued
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.frame = None
+        self.frame_id = 0
+        self.closed = False
+
+    def put(self, frame):
+        with self.cond:
+            self.frame = frame
+            self.frame_id += 1
+            self.cond.notify_all()
+
+    def get_newer(self, last_id, timeout=0.5):
+        with self.cond:
+            self.cond.wait_for(lambda: self.frame_id > last_id or self.closed, timeout)
+            return self.frame_id, self.frame
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
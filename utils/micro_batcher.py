@@ -0,0 +1,89 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class MicroBatcher:
+    # Collects single samples submitted from request handlers and runs them
+    # through predict_fn as one batch. A batch is flushed when it reaches
+    # max_batch_size or when window_ms has passed since its first sample,
+    # so the extra latency per request is bounded by the window.
+    # on_batch(batch_size, queue_waits, predict_seconds), if given, is called
+    # after every batch (for metrics).
+    def __init__(self, predict_fn, max_batch_size=16, window_ms=5.0, on_batch=None):
+        self.predict_fn = predict_fn
+        self.on_batch = on_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.queue = None
+        self._task = None
+        # One worker: batches run back to back instead of fighting over cores
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batcher")
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, x):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        await self.queue.put((x, fut, loop.time()))
+        return await fut
+
+    def depth(self):
+        return self.queue.qsize() if self.queue is not None else 0
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        deadline = loop.time() + self.window
+        while len(items) < self.max_batch_size:
+            # Take whatever is already waiting before sleeping on the window
+            if not self.queue.empty():
+                items.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            # Callers that already gave up (client disconnects) are skipped
+            items = [item for item in items if not item[1].done()]
+            if not items:
+                continue
+            # A failing batch (mismatched shapes, predict or metrics errors)
+            # fails only its own callers; the loop keeps serving
+            try:
+                await self._run_batch(loop, items)
+            except Exception as e:
+                for _, fut, _ in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def _run_batch(self, loop, items):
+        batch = np.stack([x for x, _, _ in items])
+        started = loop.time()
+        preds = await loop.run_in_executor(self._executor, self.predict_fn, batch)
+        if self.on_batch is not None:
+            self.on_batch(len(items), [started - queued for _, _, queued in items], loop.time() - started)
+        for (_, fut, _), pred in zip(items, preds):
+            if not fut.done():
+                fut.set_result(pred)
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+# Local versioned model registry:
+#   <registry>/<name>/v0001/model.h5        the model (plus model.tflite if one
+#                                            was exported next to it)
+#   <registry>/<name>/v0001/metadata.json   version, creation time, source,
+#                                            sha256 per file, validation metrics
+#   <registry>/<name>/aliases.json          {"production": "v0001", "candidate": "v0002"}
+# A version is written under a temporary name and renamed into place, and
+# aliases.json is replaced atomically, so a reader polling the registry
+# (the backend) never sees a half-written version. Versions are immutable;
+# promoting one only moves an alias.
+
+METADATA_FILE = "metadata.json"
+ALIASES_FILE = "aliases.json"
+MODEL_STEM = "model"
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def versions(root, name):
+    model_dir = os.path.join(root, name)
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(d for d in os.listdir(model_dir) if d.startswith("v") and d[1:].isdigit())
+
+
+def version_dir(root, name, version):
+    return os.path.join(root, name, version)
+
+
+def read_metadata(root, name, version):
+    with open(os.path.join(version_dir(root, name, version), METADATA_FILE)) as f:
+        return json.load(f)
+
+
+def model_path(root, name, version):
+    # The .h5 when there is one; the inference backend picks model.tflite next to it if configured
+    meta = read_metadata(root, name, version)
+    return os.path.join(version_dir(root, name, version), meta["model_file"])
+
+
+def register(root, name, src_model, metrics=None, source=None, alias=None):
+    # Copies src_model (and a sibling .tflite export) into the next version
+    # and returns the version string, e.g. "v0003"
+    model_dir = os.path.join(root, name)
+    os.makedirs(model_dir, exist_ok=True)
+    ext = os.path.splitext(src_model)[1]
+    files = {MODEL_STEM + ext: src_model}
+    tflite = os.path.splitext(src_model)[0] + ".tflite"
+    if ext != ".tflite" and os.path.exists(tflite):
+        files[MODEL_STEM + ".tflite"] = tflite
+
+    tmp = tempfile.mkdtemp(dir=model_dir, prefix=".tmp-")
+    try:
+        checksums = {}
+        for fname, src in files.items():
+            shutil.copy2(src, os.path.join(tmp, fname))
+            checksums[fname] = sha256_file(os.path.join(tmp, fname))
+        while True:
+            existing = versions(root, name)
+            version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+            meta = {
+                "name": name,
+                "version": version,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "model_file": MODEL_STEM + ext,
+                "sha256": checksums,
+                "metrics": metrics or {},
+                "source": source or {"path": os.path.abspath(src_model)},
+            }
+            with open(os.path.join(tmp, METADATA_FILE), "w") as f:
+                json.dump(meta, f, indent=2)
+            try:
+                # Fails if another registration took this number first
+                os.rename(tmp, os.path.join(model_dir, version))
+                break
+            except OSError:
+                if not os.path.isdir(os.path.join(model_dir, version)):
+                    raise
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    if alias:
+        set_alias(root, name, alias, version)
+    return version
+
+
+def verify(root, name, version):
+    # Files whose sha256 no longer matches the metadata (empty if intact)
+    meta = read_metadata(root, name, version)
+    vdir = version_dir(root, name, version)
+    bad = []
+    for fname, digest in meta["sha256"].items():
+        path = os.path.join(vdir, fname)
+        if not os.path.exists(path) or sha256_file(path) != digest:
+            bad.append(fname)
+    return bad
+
+
+def read_aliases(root, name):
+    try:
+        with open(os.path.join(root, name, ALIASES_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def set_alias(root, name, alias, version):
+    # version=None removes the alias
+    if version is not None and version not in versions(root, name):
+        raise ValueError(f"{name} has no version {version}")
+    aliases = read_aliases(root, name)
+    if version is None:
+        aliases.pop(alias, None)
+    else:
+        aliases[alias] = version
+    _write_json_atomic(os.path.join(root, name, ALIASES_FILE), aliases)
+    return aliases
+
+
+def resolve(root, name, alias="production"):
+    # (version, model path) behind an alias, or (None, None)
+    version = read_aliases(root, name).get(alias)
+    if version is None:
+        return None, None
+    return version, model_path(root, name, version)
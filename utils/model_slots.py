@@ -0,0 +1,123 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReady(Exception):
+    pass
+
+
+class ModelSlot:
+    # Holds one model that is loaded and warmed up on a background thread.
+    # Request handlers call require(), which fails fast with ModelNotReady
+    # until the model is usable, and status() feeds the readiness endpoint.
+    # version_fn(path), if given, identifies the loaded weights (e.g. a
+    # content hash) for caches keyed by model version.
+    # reload(path) loads and warms up a replacement while the current model
+    # keeps serving, then swaps both in with one assignment, so a batch that
+    # called require_versioned() runs entirely on one version.
+    def __init__(self, name, path, warmup_fn=None, load_fn=None, version_fn=None):
+        self.name = name
+        self.path = path
+        self.warmup_fn = warmup_fn
+        self.load_fn = load_fn
+        self.version_fn = version_fn
+        self._current = (None, None)  # (model, version), swapped as one
+        self.state = "pending"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.loads = 0
+        self.loading_path = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return self._current[0]
+
+    @property
+    def version(self):
+        return self._current[1]
+
+    def start(self):
+        if self._thread is None:
+            self.reload(self.path)
+
+    def reload(self, path):
+        # False if a load is already running
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            if self.model is None:
+                self.state = "loading"
+            self.loading_path = path
+            self._thread = threading.Thread(target=self._load, args=(path,), name=f"load-{self.name}", daemon=True)
+            self._thread.start()
+            return True
+
+    def unload(self):
+        self._current = (None, None)
+        self.path = None
+        self.state = "pending"
+
+    def _load(self, path):
+        try:
+            t0 = time.perf_counter()
+            if self.load_fn is None:
+                # TensorFlow is only imported here, off the startup path
+                from tensorflow.keras.models import load_model
+                model = load_model(path)
+            else:
+                model = self.load_fn(path)
+            version = self.version_fn(path) if self.version_fn is not None else None
+            load_seconds = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            if self.warmup_fn is not None:
+                self.warmup_fn(model)
+            warmup_seconds = time.perf_counter() - t0
+
+            self._current = (model, version)
+            self.path = path
+            self.load_seconds, self.warmup_seconds = load_seconds, warmup_seconds
+            self.error = None
+            self.loads += 1
+            self.state = "ready"
+            logger.info(f"Model {self.name} ready ({path}): load={load_seconds:.2f}s, warmup={warmup_seconds:.2f}s")
+        except Exception as e:
+            self.error = str(e)
+            # A failed reload keeps serving the previous model
+            if self.model is None:
+                self.state = "failed"
+            logger.error(f"Error loading model {self.name} from {path}: {e}")
+        finally:
+            self.loading_path = None
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.state == "ready"
+
+    def require(self):
+        return self.require_versioned()[0]
+
+    def require_versioned(self):
+        model, version = self._current
+        if self.state != "ready" or model is None:
+            raise ModelNotReady(f"{self.name} model is {self.state}")
+        return model, version
+
+    def status(self):
+        return {
+            "state": self.state,
+            "path": self.path,
+            "version": self.version,
+            "loads": self.loads,
+            "loading": self.loading_path,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
@@ -0,0 +1,135 @@
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Prediction cache keyed by the content hash of an input plus the version
+# of the model that scored it. The first tier is a bounded in-memory LRU
+# with a TTL. The optional second tier is a SQLite file that several
+# uvicorn workers on one host can share; its hits are copied into memory.
+# Entries from any other model version are never returned: when the
+# version changes, memory is cleared. SQLite rows are not deleted then,
+# because workers sharing the file swap models at different times and
+# would keep deleting each other's rows; lookups filter on the version,
+# and rows of every version expire after the TTL.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    version TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (version, key)
+)
+"""
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, max_entries=10000, ttl=3600.0, db_path=None, purge_every=1000):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.db_path = db_path
+        self.purge_every = purge_every
+        self.version = None
+        self.hits = {"memory": 0, "sqlite": 0}
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._puts = 0
+        if db_path:
+            self._db().executescript(SCHEMA)
+
+    def _db(self):
+        # One connection per thread; WAL lets other workers read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def set_version(self, version):
+        # Called with the served model's version before every lookup; a new
+        # version clears the memory tier (SQLite rows just stop matching)
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            self._entries.clear()
+            self.version = version
+        if self.db_path:
+            self._purge_expired()
+
+    def get(self, key):
+        now = time.monotonic()
+        version = self.version
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits["memory"] += 1
+                    return value
+                del self._entries[key]
+        if self.db_path:
+            row = self._db().execute(
+                "SELECT value, created FROM predictions WHERE version = ? AND key = ? AND created > ?",
+                (version, key, time.time() - self.ttl)).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                with self._lock:
+                    # Not copied into memory if the version changed meanwhile
+                    if self.version == version:
+                        self._remember(key, value, expires=now + self.ttl - (time.time() - row[1]))
+                    self.hits["sqlite"] += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, version):
+        # version is the one the value was computed with; results that
+        # finish after a version change are dropped. The check and both
+        # inserts hold the lock set_version takes, so a value can't land
+        # after the switch has cleared memory
+        with self._lock:
+            if version != self.version:
+                return
+            self._remember(key, value, expires=time.monotonic() + self.ttl)
+            if not self.db_path:
+                return
+            self._db().execute("INSERT OR REPLACE INTO predictions (version, key, value, created) VALUES (?, ?, ?, ?)",
+                               (version, key, json.dumps(value), time.time()))
+            self._puts += 1
+            purge = self._puts % self.purge_every == 0
+        if purge:
+            self._purge_expired()
+
+    def _purge_expired(self):
+        self._db().execute("DELETE FROM predictions WHERE created <= ?", (time.time() - self.ttl,))
+
+    def _remember(self, key, value, expires):
+        # Caller holds self._lock
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            self._db().execute("DELETE FROM predictions")
+
+    def __len__(self):
+        return len(self._entries)
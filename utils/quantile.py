@@ -0,0 +1,55 @@
+import math
+import numpy as np
+
+
+class QuantileSketch:
+    # Streaming quantile estimate with bounded memory (DDSketch-style).
+    # Values are counted in log-spaced buckets, so any quantile is returned
+    # within relative_accuracy of the exact value. Memory depends on the
+    # value range, not on how many values were added, and updates are
+    # vectorized over whole chunks.
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.min_index = 0
+        self.zero_count = 0  # Values <= 0 (errors can be exactly zero)
+        self.count = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if not len(positive):
+            return
+        idx = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+        lo, hi = int(idx.min()), int(idx.max())
+        if not len(self.counts):
+            self.min_index = lo
+            self.counts = np.zeros(hi - lo + 1, dtype=np.int64)
+        else:
+            # Grow the bucket array to cover the new range
+            new_min = min(lo, self.min_index)
+            new_max = max(hi, self.min_index + len(self.counts) - 1)
+            if new_min < self.min_index or new_max >= self.min_index + len(self.counts):
+                grown = np.zeros(new_max - new_min + 1, dtype=np.int64)
+                start = self.min_index - new_min
+                grown[start:start + len(self.counts)] = self.counts
+                self.counts, self.min_index = grown, new_min
+        self.counts += np.bincount(idx - self.min_index, minlength=len(self.counts))
+
+    def percentile(self, p):
+        # Same convention as np.percentile: p in [0, 100]
+        if self.count == 0:
+            return float("nan")
+        rank = p / 100.0 * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulative = self.zero_count + np.cumsum(self.counts)
+        i = int(np.searchsorted(cumulative, rank, side="right"))
+        i = min(i, len(self.counts) - 1)
+        return 2 * self.gamma ** (self.min_index + i) / (self.gamma + 1)
@@ -0,0 +1,90 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# Low-rate sampling profiler for a running process. While active, a
+# background thread snapshots every other thread's Python stack each
+# interval and counts identical stacks. Results come out in the collapsed
+# "frame;frame;frame count" format that flamegraph.pl and speedscope read.
+# Nothing runs while it is stopped.
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self.samples = Counter()
+        self.sample_count = 0
+        self.interval = None
+        self.started_at = None
+        self.stopped_at = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=10.0, duration_s=30.0):
+        # Starts a fresh profile that stops by itself after duration_s
+        with self._lock:
+            if self.running:
+                return False
+            self.samples = Counter()
+            self.sample_count = 0
+            self.interval = max(float(interval_ms), 1.0) / 1000.0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(float(duration_s),), name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _run(self, duration_s):
+        own = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + duration_s
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            round_samples = Counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                round_samples[";".join(reversed(stack))] += 1
+            with self._lock:
+                self.samples.update(round_samples)
+                self.sample_count += 1
+        self.stopped_at = time.time()
+
+    def _snapshot(self):
+        with self._lock:
+            return Counter(self.samples)
+
+    def collapsed(self):
+        return "\n".join(f"{stack} {n}" for stack, n in self._snapshot().most_common()) + "\n"
+
+    def status(self, top=20):
+        # Leaf frames with the most samples, for a quick look without a flamegraph
+        leaves = Counter()
+        for stack, n in self._snapshot().items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000 if self.interval else None,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "samples": self.sample_count,
+            "top_frames": [{"frame": f, "samples": n} for f, n in leaves.most_common(top)],
+        }
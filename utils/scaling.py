@@ -0,0 +1,17 @@
+import numpy as np
+
+
+class MaxScaler:
+    # The sensor scaler as it is saved by train_lstm_autoencoder.py (only
+    # data_max_). Same output as the MinMaxScaler the scripts rebuild by
+    # setting scale_ = 1 / data_max_ and min_ = 0, without importing sklearn.
+    def __init__(self, data_max):
+        self.data_max_ = np.asarray(data_max, dtype=np.float64)
+        self.scale_ = 1.0 / self.data_max_
+
+    def transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.scale_
+
+
+def load_scaler(path="models/lstm_scaler.npy"):
+    return MaxScaler(np.load(path))
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.sequences import sliding_windows
+
+
+class SensorWindowStore:
+    # Fixed-size ring buffer of the latest readings per machine/stream ID.
+    # Each buffer is preallocated once; appending a reading is one row write.
+    def __init__(self, window_size=30, n_features=3, max_streams=10000):
+        self.window_size = window_size
+        self.n_features = n_features
+        self.max_streams = max_streams
+        self._buffers = OrderedDict()  # stream_id -> [array, count]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def _entry(self, stream_id):
+        entry = self._buffers.get(stream_id)
+        if entry is None:
+            entry = [np.empty((self.window_size, self.n_features), dtype=np.float32), 0]
+            self._buffers[stream_id] = entry
+            # Least recently seen streams are dropped past the cap
+            if len(self._buffers) > self.max_streams:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(stream_id)
+        return entry
+
+    def append(self, stream_id, reading):
+        # Stores one (already scaled) reading and returns the current window,
+        # oldest first, plus how many real readings it holds
+        with self._lock:
+            entry = self._entry(stream_id)
+            buf, count = entry
+            buf[count % self.window_size] = reading
+            entry[1] = count + 1
+            return self._window(buf, count + 1), min(count + 1, self.window_size)
+
+    def extend(self, stream_id, readings):
+        # Bulk version of append: stores all readings and returns the history
+        # that precedes them (up to window_size-1 rows, oldest first) along
+        # with how many readings the stream had seen before
+        with self._lock:
+            entry = self._entry(stream_id)
+            buf, count = entry
+            keep = min(count, self.window_size - 1)
+            history = self._window(buf, count)[self.window_size - keep:] if keep else buf[:0].copy()
+            n = len(readings)
+            tail = readings[-self.window_size:]
+            buf[(count + np.arange(n - len(tail), n)) % self.window_size] = tail
+            entry[1] = count + n
+            return history, count
+
+    def _window(self, buf, count):
+        if count < self.window_size:
+            # Cold start: pad the front with the first reading. With a single
+            # reading this is the same as the stateless repeated window.
+            window = np.empty_like(buf)
+            window[self.window_size - count:] = buf[:count]
+            window[:self.window_size - count] = buf[0]
+            return window
+        pos = count % self.window_size
+        return np.concatenate([buf[pos:], buf[:pos]])
+
+    def reset(self, stream_id=None):
+        with self._lock:
+            if stream_id is None:
+                self._buffers.clear()
+            else:
+                self._buffers.pop(stream_id, None)
+
+
+def windows_for(history, readings, window_size):
+    # One window per new reading, ending at that reading, as a strided view
+    # over history + readings. Streams with fewer than window_size-1 rows of
+    # history are front-padded with their first reading (cold start).
+    series = np.concatenate([history, readings]).astype(np.float32, copy=False)
+    pad = window_size - 1 - len(history)
+    if pad > 0:
+        series = np.concatenate([np.repeat(series[:1], pad, axis=0), series])
+    return sliding_windows(series, window_size)
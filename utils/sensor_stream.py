@@ -0,0 +1,106 @@
+import os
+import time
+import numpy as np
+
+FEED_COLUMNS = ["timestamp", "vibration", "temp", "pressure", "label"]
+FEATURES = ["vibration", "temp", "pressure"]
+
+
+class SensorFeedWriter:
+    # Keeps the live feed open for the whole run instead of reopening it per row.
+    # Every row is flushed so readers see it straight away.
+    def __init__(self, path, columns=FEED_COLUMNS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.f = open(path, "w", newline="")
+        self.f.write(",".join(columns) + "\n")
+        self.f.flush()
+
+    def write(self, values):
+        self.f.write(",".join(map(str, values)) + "\n")
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SensorFeedTail:
+    # Tail-follow reader for the live CSV feed. It remembers the byte offset
+    # of the last complete line, so each read only parses bytes appended since
+    # the previous one. A truncated or replaced file is read again from the top.
+    def __init__(self, path, features=FEATURES):
+        self.path = path
+        self.features = features
+        self.f = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.ts_idx = None
+        self.feature_idx = None
+
+    def _open(self):
+        self.close()
+        self.f = open(self.path, "rb")
+        self.inode = os.fstat(self.f.fileno()).st_ino
+        self.offset = 0
+        self.partial = b""
+        self.ts_idx = None
+
+    def _check_file(self):
+        if not os.path.exists(self.path):
+            self.close()
+            return False
+        if self.f is None or os.stat(self.path).st_ino != self.inode:
+            self._open()
+        elif os.fstat(self.f.fileno()).st_size < self.offset:
+            self._open()  # Truncated: the writer started a new feed
+        return True
+
+    def read_new(self):
+        # Returns (timestamps, values) for the rows appended since the last
+        # call; values is an (n, len(features)) float array
+        empty = ([], np.empty((0, len(self.features))))
+        if not self._check_file():
+            return empty
+        self.f.seek(self.offset)
+        data = self.f.read()
+        if not data:
+            return empty
+        self.offset += len(data)
+        data = self.partial + data
+        cut = data.rfind(b"\n") + 1
+        self.partial = data[cut:]
+        lines = data[:cut].decode().splitlines()
+        if self.ts_idx is None and lines:
+            header = lines.pop(0).split(",")
+            self.ts_idx = header.index("timestamp")
+            self.feature_idx = [header.index(c) for c in self.features]
+        timestamps, rows = [], []
+        for line in lines:
+            if not line:
+                continue
+            parts = line.split(",")
+            timestamps.append(parts[self.ts_idx])
+            rows.append([float(parts[i]) for i in self.feature_idx])
+        if not rows:
+            return empty
+        return timestamps, np.array(rows)
+
+    def follow(self, poll_interval=0.5):
+        # Generator that yields (timestamps, values) batches as rows arrive
+        while True:
+            timestamps, values = self.read_new()
+            if len(values):
+                yield timestamps, values
+            else:
+                time.sleep(poll_interval)
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
@@ -0,0 +1,49 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(data, window_size=30):
+    # Every window of window_size consecutive rows, shape (n - window_size + 1,
+    # window_size, features). This is a strided view: no rows are copied.
+    data = np.asarray(data)
+    if len(data) < window_size:
+        return np.empty((0, window_size) + data.shape[1:], dtype=data.dtype)
+    return np.moveaxis(sliding_window_view(data, window_size, axis=0), -1, 1)
+
+
+def create_sequences(data, window_size=30):
+    # Same windows the old per-script loop built (range(len(data) - window_size)),
+    # so window i still lines up with row i + window_size for labelling
+    return sliding_windows(data, window_size)[:-1]
+
+
+def iter_sequence_batches(sequences, batch_size=4096):
+    # Contiguous copies of batch_size windows at a time, so a model only
+    # ever sees one batch of materialized windows
+    for start in range(0, len(sequences), batch_size):
+        yield np.ascontiguousarray(sequences[start:start + batch_size])
+
+
+def reconstruction_errors(model, sequences, batch_size=4096):
+    # Per-window mean squared reconstruction error, computed batch by batch
+    errors = np.empty(len(sequences), dtype=np.float64)
+    start = 0
+    for batch in iter_sequence_batches(sequences, batch_size):
+        recon = model.predict(batch, verbose=0)
+        errors[start:start + len(batch)] = np.mean(np.square(batch - recon), axis=(1, 2))
+        start += len(batch)
+    return errors
+
+
+def sequence_dataset(data, window_size=30, batch_size=32, shuffle=False, seed=None):
+    # tf.data pipeline of (window, window) pairs for autoencoder training.
+    # Windows are sliced per batch from the raw series, so the full windowed
+    # tensor is never allocated. Yields the same windows as create_sequences.
+    import tensorflow as tf
+
+    data = np.asarray(data, dtype=np.float32)
+    ds = tf.keras.utils.timeseries_dataset_from_array(
+        data[:-1], None, sequence_length=window_size,
+        batch_size=batch_size, shuffle=shuffle, seed=seed,
+    )
+    return ds.map(lambda x: (x, x), num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)